@@ -0,0 +1,88 @@
+import json
+import sys
+import time
+from multiprocessing import Pool
+
+from cache import load_graph
+from query import answer, answer_in_worker, init_worker
+
+# Pairs handed to a pool worker at a time
+CHUNK_SIZE = 64
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python batch.py directory [pairs] [processes]")
+    directory = sys.argv[1]
+    filename = sys.argv[2] if len(sys.argv) >= 3 else "-"
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else 1
+
+    # Read tab-separated (source, target) name pairs
+    if filename == "-":
+        pairs, errors = read_pairs(sys.stdin)
+    else:
+        with open(filename, encoding="utf-8") as f:
+            pairs, errors = read_pairs(f)
+
+    # Malformed lines get an error record in their place in the output
+    start = time.perf_counter()
+    count = 0
+    results = run(directory, pairs, processes)
+    for i in range(len(pairs) + len(errors)):
+        if i in errors:
+            print(json.dumps(errors[i]))
+            continue
+        print(json.dumps(next(results)))
+        count += 1
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0
+    print(f"{count} queries in {elapsed:.2f}s ({rate:.1f} queries/second)",
+          file=sys.stderr)
+
+
+def read_pairs(lines):
+    """
+    Returns (pairs, errors) from tab-separated lines, skipping blank
+    lines: a list of (source, target) names, and an error record for
+    each line without exactly one tab, keyed by its position among the
+    answers.
+    """
+    pairs = []
+    errors = {}
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            errors[len(pairs) + len(errors)] = {
+                "line": number,
+                "error": "expected a source and a target separated by a tab",
+            }
+            continue
+        source, target = fields
+        pairs.append((source.strip(), target.strip()))
+    return pairs, errors
+
+
+def run(directory, pairs, processes=1):
+    """
+    Yields an answer for each (source, target) pair, in order.
+    With more than one process, pairs are fanned out over a pool of
+    workers that each memory-map the same cached graph.
+    """
+    if processes <= 1:
+        graph = load_graph(directory)
+        for source, target in pairs:
+            yield answer(graph, source, target)
+        return
+
+    # Build the cache once up front so workers only map it
+    load_graph(directory)
+    with Pool(processes, initializer=init_worker, initargs=(directory,)) as pool:
+        yield from pool.imap(answer_in_worker, pairs, chunksize=CHUNK_SIZE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+import cache
+import degrees
+import graph
+import landmarks
+import names
+import paths
+import util
+
+# Sizes (number of people) used when none are given on the command line
+SIZES = [10000, 100000, 1000000]
+
+# Largest graph the list-backed frontier is timed on, it is quadratic
+OLD_FRONTIER_LIMIT = 10000
+
+# Average number of stars per synthetic movie
+CAST_SIZE = 4
+
+# Syllables that synthetic names for the name index benchmark are made of
+SYLLABLES = [
+    "an", "am", "ber", "chard", "el", "ford", "jo", "ka", "li", "ly", "mas",
+    "mi", "na", "ri", "ro", "sa", "son", "ste", "ten", "tho", "ven", "wil",
+]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}] [size ...]")
+    sizes = [int(size) for size in sys.argv[2:]] or SIZES
+    BENCHMARKS[sys.argv[1]](sizes)
+
+
+def synthetic_data(size, seed=0):
+    """
+    Populate `degrees.people`, `degrees.movies` and `degrees.names` with
+    a random co-star graph of `size` people and `size // 2` movies.
+    """
+    rng = random.Random(seed)
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+    for i in range(size):
+        person_id = str(i)
+        degrees.people[person_id] = {
+            "name": f"Person {i}", "birth": "", "movies": set()
+        }
+        degrees.names[f"person {i}"] = {person_id}
+
+    for i in range(size // 2):
+        movie_id = f"m{i}"
+        stars = {str(rng.randrange(size)) for _ in range(CAST_SIZE)}
+        degrees.movies[movie_id] = {"title": f"Movie {i}", "year": "", "stars": stars}
+        for person_id in stars:
+            degrees.people[person_id]["movies"].add(movie_id)
+
+    return rng
+
+
+def write_csv(directory):
+    """
+    Write the data in `degrees.people` and `degrees.movies` to
+    people.csv, movies.csv and stars.csv in `directory`.
+    """
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id, person in degrees.people.items():
+            writer.writerow([person_id, person["name"], person["birth"]])
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id, movie in degrees.movies.items():
+            writer.writerow([movie_id, movie["title"], movie["year"]])
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id, movie in degrees.movies.items():
+            for person_id in movie["stars"]:
+                writer.writerow([person_id, movie_id])
+
+
+def measured(load):
+    """
+    Returns (result, seconds, bytes allocated) for calling `load`.
+    The call is made twice, once for time and once under tracemalloc.
+    """
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = load()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def timed_search(source, target, method="bfs"):
+    """
+    Returns (path length, seconds) for a `degrees.shortest_path` query.
+    """
+    start = time.perf_counter()
+    path = degrees.shortest_path(source, target, method)
+    elapsed = time.perf_counter() - start
+    return (None if path is None else len(path)), elapsed
+
+
+def counted_search(source, target, method):
+    """
+    Returns (path length, seconds, people expanded) for a
+    `degrees.shortest_path` query.
+    """
+    neighbors_for_person = degrees.neighbors_for_person
+    expanded = 0
+
+    def counting_neighbors(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        length, elapsed = timed_search(source, target, method)
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+    return length, elapsed, expanded
+
+
+def benchmark_frontier(sizes, queries=5):
+    """
+    Times `shortest_path` with the list-backed frontier against the
+    deque-backed one on the same random queries.
+    """
+    frontiers = [("list", ListQueueFrontier), ("deque", util.QueueFrontier)]
+    print(f"{'people':>10} {'frontier':>9} {'seconds/query':>14}")
+    for size in sizes:
+        rng = synthetic_data(size)
+        pairs = [
+            (str(rng.randrange(size)), str(rng.randrange(size)))
+            for _ in range(queries)
+        ]
+        for name, frontier in frontiers:
+            if frontier is ListQueueFrontier and size > OLD_FRONTIER_LIMIT:
+                print(f"{size:>10} {name:>9} {'skipped':>14}")
+                continue
+            degrees.QueueFrontier = frontier
+            total = sum(timed_search(*pair)[1] for pair in pairs)
+            print(f"{size:>10} {name:>9} {total / queries:>14.4f}")
+        degrees.QueueFrontier = util.QueueFrontier
+
+
+def benchmark_bidirectional(sizes, queries=5):
+    """
+    Compares one-sided and bidirectional search on the same random
+    queries, by time and by number of people expanded.
+    """
+    methods = ["bfs", "bidirectional"]
+    print(f"{'people':>10} {'method':>14} {'seconds/query':>14} {'expanded/query':>15}")
+    for size in sizes:
+        rng = synthetic_data(size)
+        pairs = [
+            (str(rng.randrange(size)), str(rng.randrange(size)))
+            for _ in range(queries)
+        ]
+        for method in methods:
+            results = [counted_search(*pair, method) for pair in pairs]
+            seconds = sum(result[1] for result in results) / queries
+            expanded = sum(result[2] for result in results) / queries
+            print(f"{size:>10} {method:>14} {seconds:>14.4f} {expanded:>15.0f}")
+
+
+def benchmark_graph(sizes, queries=20):
+    """
+    Compares the dict loader in degrees.py with the compact graph:
+    load time, memory held after loading and query latency.
+    """
+    print(f"{'people':>10} {'loader':>7} {'load s':>8} {'memory MB':>10} {'ms/query':>9}")
+    for size in sizes:
+        rng = synthetic_data(size)
+        pairs = [
+            (str(rng.randrange(size)), str(rng.randrange(size)))
+            for _ in range(queries)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(directory)
+
+            def load_dicts():
+                degrees.names.clear()
+                degrees.people.clear()
+                degrees.movies.clear()
+                degrees.load_data(directory)
+
+            _, elapsed, allocated = measured(load_dicts)
+            start = time.perf_counter()
+            for source, target in pairs:
+                degrees.shortest_path(source, target, "bidirectional")
+            latency = (time.perf_counter() - start) / queries
+            print(f"{size:>10} {'dict':>7} {elapsed:>8.2f} "
+                  f"{allocated / 2 ** 20:>10.1f} {latency * 1000:>9.3f}")
+
+            loaded, elapsed, allocated = measured(lambda: graph.from_csv(directory))
+            start = time.perf_counter()
+            for source, target in pairs:
+                loaded.shortest_path(source, target, "bidirectional")
+            latency = (time.perf_counter() - start) / queries
+            print(f"{size:>10} {'graph':>7} {elapsed:>8.2f} "
+                  f"{allocated / 2 ** 20:>10.1f} {latency * 1000:>9.3f}")
+
+
+def benchmark_cache(sizes, queries=20):
+    """
+    Times a cold start from the CSV files against a start from the
+    memory-mapped cache, each followed by a few queries.
+    """
+    print(f"{'people':>10} {'start':>7} {'load s':>8} {'ms/query':>9}")
+    for size in sizes:
+        rng = synthetic_data(size)
+        pairs = [
+            (str(rng.randrange(size)), str(rng.randrange(size)))
+            for _ in range(queries)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(directory)
+            cache.build_cache(directory)
+            for name, load in [("csv", graph.from_csv), ("cache", cache.load_graph)]:
+                start = time.perf_counter()
+                loaded = load(directory)
+                elapsed = time.perf_counter() - start
+                start = time.perf_counter()
+                for source, target in pairs:
+                    loaded.shortest_path(source, target, "bidirectional")
+                latency = (time.perf_counter() - start) / queries
+                print(f"{size:>10} {name:>7} {elapsed:>8.3f} {latency * 1000:>9.3f}")
+
+
+def benchmark_landmarks(sizes, queries=200, count=landmarks.LANDMARKS):
+    """
+    Reports how close landmark bounds are to exact degrees, how fast
+    they are, and how A* with the landmark heuristic compares with
+    bidirectional search.
+    """
+    for size in sizes:
+        rng = synthetic_data(size)
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(directory)
+            loaded = cache.load_graph(directory)
+
+            start = time.perf_counter()
+            index = landmarks.build_landmarks(loaded, count)
+            build = time.perf_counter() - start
+
+            pairs = [(rng.randrange(size), rng.randrange(size)) for _ in range(queries)]
+            start = time.perf_counter()
+            bounds = [index.bounds(a, b) for a, b in pairs]
+            estimate = (time.perf_counter() - start) / queries
+
+            start = time.perf_counter()
+            exact = [loaded.bidirectional(a, b) for a, b in pairs]
+            bidirectional = (time.perf_counter() - start) / queries
+
+            start = time.perf_counter()
+            guided = [loaded.astar(a, b, index) for a, b in pairs]
+            astar = (time.perf_counter() - start) / queries
+
+        connected = [
+            (len(path), bound) for path, bound in zip(exact, bounds)
+            if path is not None
+        ]
+        tight = sum(upper == length for length, (_, upper) in connected)
+        error = sum(upper - length for length, (_, upper) in connected if upper is not None)
+        slack = sum(length - lower for length, (lower, _) in connected)
+        agree = all(
+            (a is None and b is None) or len(a) == len(b)
+            for a, b in zip(exact, guided)
+        )
+        print(f"{size} people, {count} landmarks built in {build:.2f}s")
+        print(f"  bounds:        {estimate * 1e6:.1f} us/pair")
+        print(f"  upper exact:   {tight}/{len(connected)} connected pairs, "
+              f"mean error {error / max(len(connected), 1):.2f}")
+        print(f"  lower slack:   mean {slack / max(len(connected), 1):.2f}")
+        print(f"  bidirectional: {bidirectional * 1000:.3f} ms/query")
+        print(f"  astar:         {astar * 1000:.3f} ms/query, "
+              f"{'same' if agree else 'DIFFERENT'} lengths")
+
+
+def benchmark_names(sizes, queries=50):
+    """
+    Times exact, prefix and fuzzy name lookups over synthetic names.
+    """
+    print(f"{'people':>10} {'lookup':>10} {'ms/query':>9}")
+    for size in sizes:
+        rng = random.Random(0)
+
+        def word():
+            return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+        person_ids = [str(i) for i in range(size)]
+        person_names = [f"{word()} {word()}" for _ in range(size)]
+        empty = (array("i", bytes(4 * (size + 1))), array("i"))
+        loaded = graph.Graph(
+            (person_ids, person_names, [""] * size),
+            ([], [], []),
+            empty,
+            (array("i", [0]), array("i")),
+            graph.sorted_order(person_ids),
+            array("i"),
+            graph.sorted_order([name.lower() for name in person_names]),
+            graph.deletion_index([name.lower() for name in person_names], size),
+        )
+
+        # Look up real names, their prefixes, and names with a typo
+        sample = [rng.choice(person_names) for _ in range(queries)]
+        lookups = [
+            ("exact", lambda name: loaded.people_named(name)),
+            ("prefix", lambda name: names.with_prefix(loaded, name[:5])),
+            ("fuzzy 1", lambda name: names.similar(loaded, name[:-1] + "x", 1)),
+            ("fuzzy 2", lambda name: names.similar(loaded, name[:-1] + "x", 2)),
+        ]
+        for lookup, run in lookups:
+            start = time.perf_counter()
+            for name in sample:
+                run(name)
+            latency = (time.perf_counter() - start) / queries
+            print(f"{size:>10} {lookup:>10} {latency * 1000:>9.3f}")
+
+
+def benchmark_paths(sizes, queries=20, limit=paths.LIMIT):
+    """
+    Times all-shortest-paths sweeps from the best connected person to
+    random targets, and enumerating up to `limit` of the paths.
+    """
+    print(f"{'people':>10} {'ms/dag':>8} {'ms/paths':>9} {'mean paths':>11} {'most paths':>11}")
+    for size in sizes:
+        rng = synthetic_data(size)
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(directory)
+            loaded = cache.load_graph(directory)
+            hub = max(range(size), key=lambda person: landmarks.costars(loaded, person))
+            targets = [rng.randrange(size) for _ in range(queries)]
+
+            start = time.perf_counter()
+            dags = [paths.shortest_path_dag(loaded, hub, target) for target in targets]
+            sweep = (time.perf_counter() - start) / queries
+            dags = [dag for dag in dags if dag is not None]
+
+            start = time.perf_counter()
+            for dag in dags:
+                dag.paths(limit)
+            enumerate_paths = (time.perf_counter() - start) / max(len(dags), 1)
+
+        counts = [dag.count() for dag in dags] or [0]
+        print(f"{size:>10} {sweep * 1000:>8.2f} {enumerate_paths * 1000:>9.3f} "
+              f"{sum(counts) / len(counts):>11.1f} {max(counts):>11}")
+
+
+class ListStackFrontier():
+    """
+    Original list-backed frontier, kept for comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+    def insert(self, idx, node):
+        self.frontier.insert(idx, node)
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+BENCHMARKS = {
+    "frontier": benchmark_frontier,
+    "bidirectional": benchmark_bidirectional,
+    "graph": benchmark_graph,
+    "cache": benchmark_cache,
+    "landmarks": benchmark_landmarks,
+    "names": benchmark_names,
+    "paths": benchmark_paths,
+}
+
+
+if __name__ == "__main__":
+    main()
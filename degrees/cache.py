@@ -0,0 +1,300 @@
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+from array import array
+
+from graph import Graph, compress, deletion_index, from_csv, read_chunks, transpose
+
+# Name of the cache file written next to the CSV files
+CACHE_FILE = "graph.cache"
+
+# Bump whenever the layout below changes, so old caches are rebuilt
+VERSION = 3
+
+MAGIC = b"DEGR"
+
+# CSV files the cache is built from, in stamp order
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Header: magic, version, (mtime_ns, size) for each source, dropped
+# stars rows, section count
+HEADER = struct.Struct("<4sI6qqI")
+
+# Section table entry: (offset, length) in bytes
+SECTION = struct.Struct("<QQ")
+
+
+def main():
+    if len(sys.argv) not in [2, 3] or sys.argv[2:] not in [[], ["--low-memory"]]:
+        sys.exit("Usage: python cache.py directory [--low-memory]")
+    directory = sys.argv[1]
+    dropped = build_cache(directory, low_memory=len(sys.argv) == 3)
+    print(f"Wrote {os.path.join(directory, CACHE_FILE)}")
+    if dropped:
+        print(f"Dropped {dropped} stars rows for unknown people or movies.")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings packed into one UTF-8 blob, with
+    `offsets[i]:offsets[i + 1]` spanning the i-th string.
+    Strings are decoded on access, so the blob can stay memory-mapped.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def load_graph(directory):
+    """
+    Returns the Graph for a directory of CSV files, memory-mapped from
+    its cache file if the cache matches the CSV files, otherwise parsed
+    from the CSV files and written to a fresh cache. If the cache
+    cannot be written, as in a read-only directory, the parsed graph
+    is still returned.
+    """
+    path = os.path.join(directory, CACHE_FILE)
+    graph = read_cache(path, stamps(directory))
+    if graph is None:
+        graph = from_csv(directory)
+        try:
+            write_cache(graph, path, stamps(directory))
+        except OSError:
+            pass
+    return graph
+
+
+def build_cache(directory, low_memory=False):
+    """
+    Parses the CSV files in `directory` and writes their cache file.
+    Returns the number of stars rows dropped for unknown people or movies.
+
+    With `low_memory`, names, titles and ids are staged in an on-disk
+    database instead of Python lists and dicts, so only the adjacency
+    and name deletion arrays are held in memory while building.
+    """
+    path = os.path.join(directory, CACHE_FILE)
+    source_stamps = stamps(directory)
+    if low_memory:
+        return build_low_memory(directory, path, source_stamps)
+    graph = from_csv(directory)
+    write_cache(graph, path, source_stamps)
+    return graph.dropped
+
+
+def build_low_memory(directory, path, source_stamps):
+    """
+    Writes a cache file by streaming the CSV files through a scratch
+    SQLite database next to them. Returns the number of dropped
+    stars rows.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        db = sqlite3.connect(os.path.join(scratch, "build.db"))
+        db.execute("CREATE TABLE people (n INTEGER PRIMARY KEY, id TEXT, name TEXT, birth TEXT, name_key TEXT)")
+        db.execute("CREATE TABLE movies (n INTEGER PRIMARY KEY, id TEXT, title TEXT, year TEXT)")
+        db.execute("CREATE TABLE stars (person_id TEXT, movie_id TEXT)")
+
+        # Stream the CSV files into the database, numbering rows in file order
+        count = 0
+        for chunk in read_chunks(f"{directory}/people.csv"):
+            db.executemany("INSERT INTO people VALUES (?, ?, ?, ?, ?)", [
+                (count + i, row["id"], row["name"], row["birth"], row["name"].lower())
+                for i, row in enumerate(chunk)
+            ])
+            count += len(chunk)
+        count = 0
+        for chunk in read_chunks(f"{directory}/movies.csv"):
+            db.executemany("INSERT INTO movies VALUES (?, ?, ?, ?)", [
+                (count + i, row["id"], row["title"], row["year"])
+                for i, row in enumerate(chunk)
+            ])
+            count += len(chunk)
+        for chunk in read_chunks(f"{directory}/stars.csv"):
+            db.executemany("INSERT INTO stars VALUES (?, ?)", [
+                (row["person_id"], row["movie_id"]) for row in chunk
+            ])
+        db.execute("CREATE INDEX people_id ON people (id)")
+        db.execute("CREATE INDEX movies_id ON movies (id)")
+
+        # Only the adjacency is built in memory
+        people = db.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+        movies = db.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+        rows, cols = array("i"), array("i")
+        for person, movie in db.execute(
+            "SELECT people.n, movies.n FROM stars "
+            "JOIN people ON people.id = stars.person_id "
+            "JOIN movies ON movies.id = stars.movie_id"
+        ):
+            rows.append(person)
+            cols.append(movie)
+        dropped = db.execute("SELECT COUNT(*) FROM stars").fetchone()[0] - len(rows)
+        person_movies = compress(rows, cols, people)
+        del rows, cols
+        movie_people = transpose(person_movies, movies)
+
+        parts = []
+        for table, column in [("people", "id"), ("people", "name"), ("people", "birth"),
+                              ("movies", "id"), ("movies", "title"), ("movies", "year")]:
+            cursor = db.execute(f"SELECT {column} FROM {table} ORDER BY n")
+            blob = os.path.join(scratch, f"{table}.{column}")
+            parts.extend(spill_strings((row[0] for row in cursor), blob))
+        parts.extend([*person_movies, *movie_people])
+        for query in ["SELECT n FROM people ORDER BY id, n",
+                      "SELECT n FROM movies ORDER BY id, n",
+                      "SELECT n FROM people ORDER BY name_key, n"]:
+            parts.append(array("i", (row[0] for row in db.execute(query))))
+        parts.extend(deletion_index(
+            (row[0] for row in db.execute("SELECT name_key FROM people ORDER BY n")),
+            people,
+        ))
+        db.close()
+
+        write_sections(parts, path, source_stamps, dropped)
+        for part in parts:
+            if isinstance(part, mmap.mmap):
+                part.close()
+    return dropped
+
+
+def spill_strings(strings, path):
+    """
+    Writes strings to a UTF-8 blob file, returning (blob, offsets)
+    with the blob memory-mapped from the file.
+    """
+    offsets = array("q", [0])
+    with open(path, "wb") as f:
+        for string in strings:
+            data = string.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    if offsets[-1] == 0:
+        return b"", offsets
+    with open(path, "rb") as f:
+        blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return blob, offsets
+
+
+def stamps(directory):
+    """
+    Returns the (mtime_ns, size) of each CSV source, flattened.
+    """
+    result = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        result.extend([stat.st_mtime_ns, stat.st_size])
+    return result
+
+
+def sections(graph):
+    """
+    Returns the sections of a graph in file order, as bytes-like objects.
+    """
+    result = []
+    for column in [graph.person_ids, graph.person_names, graph.person_births,
+                   graph.movie_ids, graph.movie_titles, graph.movie_years]:
+        result.extend(pack_strings(column))
+    for ptr, idx in [graph.person_movies, graph.movie_people]:
+        result.extend([ptr, idx])
+    result.extend([graph.people_by_id, graph.movies_by_id, graph.people_by_name])
+    result.extend(graph.name_deletions)
+    return result
+
+
+def pack_strings(strings):
+    """
+    Returns (blob, offsets) for a sequence of strings.
+    """
+    if isinstance(strings, StringTable):
+        return strings.blob, strings.offsets
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("q", [0])
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+    return b"".join(encoded), offsets
+
+
+def write_cache(graph, path, source_stamps):
+    """
+    Writes a graph to a cache file, replacing any previous one.
+    """
+    write_sections(sections(graph), path, source_stamps, graph.dropped)
+
+
+def write_sections(parts, path, source_stamps, dropped=0):
+    """
+    Writes the sections of a graph, in file order, to a cache file,
+    with the number of stars rows dropped while parsing it.
+    """
+    offset = HEADER.size + SECTION.size * len(parts)
+    table = []
+    for part in parts:
+        # Keep every section 8-byte aligned for memoryview casts
+        offset += -offset % 8
+        length = memoryview(part).nbytes
+        table.append((offset, length))
+        offset += length
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *source_stamps, dropped, len(parts)))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for (offset, length), part in zip(table, parts):
+            f.write(bytes(offset - f.tell()))
+            f.write(part)
+    os.replace(temporary, path)
+
+
+def read_cache(path, source_stamps):
+    """
+    Returns the Graph memory-mapped from a cache file, or None if the
+    file is missing, from another version, or built from other CSVs.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, version, *cached_stamps, dropped, count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or cached_stamps != source_stamps:
+            return None
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    table = [
+        SECTION.unpack_from(buffer, HEADER.size + SECTION.size * i)
+        for i in range(count)
+    ]
+    parts = [buffer[offset:offset + length] for offset, length in table]
+
+    columns = []
+    for i in range(0, 12, 2):
+        columns.append(StringTable(parts[i], parts[i + 1].cast("q")))
+    arrays = [part.cast("i") for part in parts[12:]]
+
+    return Graph(
+        columns[:3],
+        columns[3:],
+        (arrays[0], arrays[1]),
+        (arrays[2], arrays[3]),
+        arrays[4],
+        arrays[5],
+        arrays[6],
+        (arrays[7], arrays[8]),
+        dropped,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import csv
 import sys
 
+from cache import load_graph
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -16,6 +17,9 @@ movies = {}
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    Returns the number of stars rows dropped because they refer to
+    a person or movie that is not in the data.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -42,14 +46,17 @@ def load_data(directory):
             }
 
     # Load stars
+    dropped = 0
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            if row["person_id"] not in people or row["movie_id"] not in movies:
+                dropped += 1
+                continue
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+            movies[row["movie_id"]]["stars"].add(row["person_id"])
+
+    return dropped
 
 
 def main():
@@ -59,17 +66,19 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    graph = load_graph(directory)
     print("Data loaded.")
+    if graph.dropped:
+        print(f"Dropped {graph.dropped} stars rows for unknown people or movies.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), graph)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), graph)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target, "bidirectional")
 
     if path is None:
         print("Not connected.")
@@ -78,19 +87,27 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person(path[i][1])["name"]
+            person2 = graph.person(path[i + 1][1])["name"]
+            movie = graph.movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, method="bfs"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `method` is either "bfs", a breadth first search from the source,
+    or "bidirectional", which searches from both ends at once.
+
     If no possible path, returns None.
     """
+    if method == "bidirectional":
+        return bidirectional_path(source, target)
+    elif method != "bfs":
+        raise ValueError(f"unknown search method {method}")
+
     # to store solution
     solution=[]
 
@@ -107,7 +124,7 @@ def shortest_path(source, target):
 
         # If nothing left in frontier, then no path
         if frontier.empty():
-            raise Exception("no solution")
+            return None
 
         # Choose a node from the frontier
         node = frontier.remove()
@@ -138,18 +155,97 @@ def shortest_path(source, target):
         
     return solution   
 
-def person_id_for_name(name):
+
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, searching from both ends at once.
+
+    Each round expands one whole level of whichever side has the smaller
+    frontier. The first person reached by both sides lies on a shortest
+    path, since the levels of both searches are expanded in full.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # leading back towards the side's starting person
+    forward = {source: None}
+    backward = {target: None}
+    forward_level = [source]
+    backward_level = [target]
+
+    while forward_level and backward_level:
+        if len(forward_level) <= len(backward_level):
+            forward_level, meeting = expand_level(forward_level, forward, backward)
+        else:
+            backward_level, meeting = expand_level(backward_level, backward, forward)
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_level(level, reached, other):
+    """
+    Expands every person in `level`, recording how each new person was
+    reached in `reached`. Returns the next level and the first person
+    also reached by the `other` side, or None if the sides have not met.
+    """
+    next_level = []
+    for person_id in level:
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in reached:
+                continue
+            reached[neighbor] = (movie_id, person_id)
+            if neighbor in other:
+                return next_level, neighbor
+            next_level.append(neighbor)
+    return next_level, None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Returns the (movie_id, person_id) path from the forward search's
+    source to the backward search's target through `meeting`.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+
+    return path
+
+
+def person_id_for_name(name, graph=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Looks the name up in `graph` if given, otherwise in the data
+    loaded by `load_data`.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.people_named(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = graph.person(person_id) if graph is not None else people[person_id]
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
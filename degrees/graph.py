@@ -0,0 +1,463 @@
+import csv
+import heapq
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+# Rows of a CSV file parsed at a time
+CHUNK_SIZE = 100000
+
+# Buckets of the name deletion index per person
+NAME_BUCKETS = 4
+
+
+class Graph():
+    """
+    Compact co-star graph.
+
+    People and movies are interned to dense integers (their row in the
+    CSV files), and stars are stored twice as compressed sparse rows:
+    person -> movies in `person_movies` and movie -> people in
+    `movie_people`. Row `i` of a CSR pair `(ptr, idx)` is
+    `idx[ptr[i]:ptr[i + 1]]`, sorted and without duplicates.
+
+    Lookups by IMDB id or by name go through index arrays sorted by
+    id and by lowercase name, so no per-person dict is kept in memory.
+    Names one edit apart are found through `name_deletions`, a CSR
+    pair from hash buckets to the people with a lowercase name one
+    deletion or less away from a string in that bucket.
+    """
+    def __init__(self, people, movies, person_movies, movie_people,
+                 people_by_id, movies_by_id, people_by_name, name_deletions,
+                 dropped=0):
+        # (ids, names, births) and (ids, titles, years) columns
+        self.person_ids, self.person_names, self.person_births = people
+        self.movie_ids, self.movie_titles, self.movie_years = movies
+
+        # (ptr, idx) CSR arrays in both directions
+        self.person_movies = person_movies
+        self.movie_people = movie_people
+
+        # Person and movie numbers sorted by id, and people by lowercase name
+        self.people_by_id = people_by_id
+        self.movies_by_id = movies_by_id
+        self.people_by_name = people_by_name
+        self.name_deletions = name_deletions
+
+        # Number of stars rows skipped when the graph was parsed
+        self.dropped = dropped
+
+    def person_index(self, person_id):
+        """
+        Returns the integer for an IMDB person id, or None.
+        """
+        return find(self.people_by_id, self.person_ids.__getitem__, person_id)
+
+    def person_indices(self, *person_ids):
+        """
+        Returns the list of integers for IMDB person ids. Raises
+        KeyError for an unknown person id.
+        """
+        people = []
+        for person_id in person_ids:
+            person = self.person_index(person_id)
+            if person is None:
+                raise KeyError(person_id)
+            people.append(person)
+        return people
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer for an IMDB movie id, or None.
+        """
+        return find(self.movies_by_id, self.movie_ids.__getitem__, movie_id)
+
+    def person(self, person_id):
+        """
+        Returns a dictionary of name and birth for an IMDB person id.
+        Raises KeyError if there is no such person.
+        """
+        i = self.person_index(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary of title and year for an IMDB movie id.
+        Raises KeyError if there is no such movie.
+        """
+        i = self.movie_index(movie_id)
+        if i is None:
+            raise KeyError(movie_id)
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def people_named(self, name):
+        """
+        Returns the IMDB ids of all people with a given name,
+        ignoring case.
+        """
+        order = self.people_by_name
+        name = name.lower()
+        key = self.lower_name
+        start = bisect_left(order, name, key=key)
+        person_ids = []
+        for k in range(start, len(order)):
+            if key(order[k]) != name:
+                break
+            person_ids.append(self.person_ids[order[k]])
+        return person_ids
+
+    def lower_name(self, person):
+        return self.person_names[person].lower()
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) integer pairs for people who starred
+        with a given person, including the person themselves.
+        """
+        ptr, idx = self.person_movies
+        movie_ptr, movie_idx = self.movie_people
+        for k in range(ptr[person], ptr[person + 1]):
+            movie = idx[k]
+            for j in range(movie_ptr[movie], movie_ptr[movie + 1]):
+                yield movie, movie_idx[j]
+
+    def shortest_path(self, source, target, method="bfs", landmarks=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target IMDB person ids.
+
+        `method` is "bfs" or "bidirectional", as in
+        `degrees.shortest_path`, or "astar", an A* search guided by
+        the lower bounds of a `landmarks.Landmarks` index.
+
+        If no possible path, returns None. Raises KeyError for an
+        unknown person id.
+        """
+        if method == "bfs":
+            search = self.bfs
+        elif method == "bidirectional":
+            search = self.bidirectional
+        elif method == "astar":
+            if landmarks is None:
+                raise ValueError("astar search needs a landmark index")
+
+            def search(source, target):
+                return self.astar(source, target, landmarks)
+        else:
+            raise ValueError(f"unknown search method {method}")
+
+        path = search(*self.person_indices(source, target))
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def bfs(self, source, target):
+        """
+        Breadth first search over person integers. Returns a list of
+        (movie, person) integer pairs, or None.
+        """
+        if source == target:
+            return []
+
+        reached = {source: None}
+        expanded = bytearray(len(self.movie_ids))
+        level = [source]
+        while level:
+            level, meeting = self.expand_level(level, reached, expanded, (target,))
+            if meeting is not None:
+                return walk(meeting, reached)[::-1]
+        return None
+
+    def bidirectional(self, source, target):
+        """
+        Bidirectional breadth first search over person integers, always
+        expanding the smaller frontier. Returns a list of (movie, person)
+        integer pairs, or None.
+        """
+        if source == target:
+            return []
+
+        forward = {source: None}
+        backward = {target: None}
+        forward_expanded = bytearray(len(self.movie_ids))
+        backward_expanded = bytearray(len(self.movie_ids))
+        forward_level = [source]
+        backward_level = [target]
+
+        while forward_level and backward_level:
+            if len(forward_level) <= len(backward_level):
+                forward_level, meeting = self.expand_level(
+                    forward_level, forward, forward_expanded, backward
+                )
+            else:
+                backward_level, meeting = self.expand_level(
+                    backward_level, backward, backward_expanded, forward
+                )
+
+            if meeting is not None:
+                path = walk(meeting, forward)[::-1]
+                person = meeting
+                while backward[person] is not None:
+                    movie, person = backward[person]
+                    path.append((movie, person))
+                return path
+
+        return None
+
+    def astar(self, source, target, landmarks):
+        """
+        A* search over person integers, using the landmark lower bound
+        on the distance to `target` as heuristic, computed once per
+        person reached. Returns a list of (movie, person) integer
+        pairs, or None.
+        """
+        if landmarks.lower_bound(source, target) is None:
+            return None
+        lower_bound = landmarks.heuristic(target)
+
+        # expanded[movie] is one more than the lowest cost the movie was
+        # expanded at, its stars cannot be improved by expanding it later
+        # from a person with at least that cost
+        ptr, idx = self.person_movies
+        movie_ptr, movie_idx = self.movie_people
+        reached = {source: None}
+        cost = {source: 0}
+        estimates = {}
+        expanded = bytearray(len(self.movie_ids))
+        frontier = [(lower_bound(source), 0, source)]
+        while frontier:
+            _, steps, person = heapq.heappop(frontier)
+            if person == target:
+                return walk(person, reached)[::-1]
+            if steps > cost[person]:
+                continue
+
+            for k in range(ptr[person], ptr[person + 1]):
+                movie = idx[k]
+                if 0 < expanded[movie] <= steps + 1:
+                    continue
+                expanded[movie] = min(steps + 1, 255)
+                for j in range(movie_ptr[movie], movie_ptr[movie + 1]):
+                    neighbor = movie_idx[j]
+                    if neighbor in cost:
+                        if cost[neighbor] <= steps + 1:
+                            continue
+                        estimate = estimates[neighbor]
+                    else:
+                        estimate = estimates[neighbor] = lower_bound(neighbor)
+                    cost[neighbor] = steps + 1
+                    reached[neighbor] = (movie, person)
+                    heapq.heappush(frontier, (steps + 1 + estimate, steps + 1, neighbor))
+        return None
+
+    def expand_level(self, level, reached, expanded, other):
+        """
+        Expands every person in `level`, recording in `reached` the
+        (movie, person) step each new person was reached from.
+
+        Movies already marked in `expanded` are skipped: every star of a
+        movie is reached the first time any one of them is expanded.
+        Returns the next level and the first new person that is in
+        `other`, or None.
+        """
+        ptr, idx = self.person_movies
+        movie_ptr, movie_idx = self.movie_people
+        next_level = []
+        for person in level:
+            for k in range(ptr[person], ptr[person + 1]):
+                movie = idx[k]
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for j in range(movie_ptr[movie], movie_ptr[movie + 1]):
+                    neighbor = movie_idx[j]
+                    if neighbor in reached:
+                        continue
+                    reached[neighbor] = (movie, person)
+                    if neighbor in other:
+                        return next_level, neighbor
+                    next_level.append(neighbor)
+        return next_level, None
+
+
+def walk(person, reached):
+    """
+    Returns the (movie, person) steps from `person` back to the start
+    of the search that filled `reached`, nearest step first.
+    """
+    path = []
+    while reached[person] is not None:
+        movie, parent = reached[person]
+        path.append((movie, person))
+        person = parent
+    return path
+
+
+def find(order, key, value):
+    """
+    Returns the element of `order` whose key equals `value`, or None.
+    `order` must be sorted by `key`.
+    """
+    k = bisect_left(order, value, key=key)
+    if k < len(order) and key(order[k]) == value:
+        return order[k]
+    return None
+
+
+def from_csv(directory, chunk_size=CHUNK_SIZE):
+    """
+    Load data from CSV files into a compact Graph, reading each file
+    `chunk_size` rows at a time.
+
+    Stars rows that refer to an unknown person or movie are skipped
+    and counted in the graph's `dropped`.
+    """
+    # Load people
+    person_ids, person_names, person_births = [], [], []
+    person_number = {}
+    for chunk in read_chunks(f"{directory}/people.csv", chunk_size):
+        for row in chunk:
+            person_number[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+
+    # Load movies
+    movie_ids, movie_titles, movie_years = [], [], []
+    movie_number = {}
+    for chunk in read_chunks(f"{directory}/movies.csv", chunk_size):
+        for row in chunk:
+            movie_number[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+
+    # Load stars, skipping rows for unknown people or movies
+    rows, cols = array("i"), array("i")
+    dropped = 0
+    for chunk in read_chunks(f"{directory}/stars.csv", chunk_size):
+        for row in chunk:
+            person = person_number.get(row["person_id"])
+            movie = movie_number.get(row["movie_id"])
+            if person is None or movie is None:
+                dropped += 1
+                continue
+            rows.append(person)
+            cols.append(movie)
+    del person_number, movie_number
+
+    person_movies = compress(rows, cols, len(person_ids))
+    del rows, cols
+    movie_people = transpose(person_movies, len(movie_ids))
+
+    lower_names = [name.lower() for name in person_names]
+    return Graph(
+        (person_ids, person_names, person_births),
+        (movie_ids, movie_titles, movie_years),
+        person_movies,
+        movie_people,
+        sorted_order(person_ids),
+        sorted_order(movie_ids),
+        sorted_order(lower_names),
+        deletion_index(lower_names, len(lower_names)),
+        dropped,
+    )
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of up to `chunk_size` rows of a CSV file, each row
+    a dictionary keyed by the header.
+    """
+    with open(path, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def compress(rows, cols, size):
+    """
+    Returns (ptr, idx) CSR arrays for the (row, col) pairs, with
+    every row sorted and duplicate pairs dropped.
+    """
+    ptr = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        ptr[row + 1] += 1
+    for i in range(size):
+        ptr[i + 1] += ptr[i]
+
+    idx = array("i", bytes(4 * len(rows)))
+    fill = ptr[:-1]
+    for row, col in zip(rows, cols):
+        idx[fill[row]] = col
+        fill[row] += 1
+
+    # Sort each row and squeeze out duplicates in place
+    end = 0
+    for i in range(size):
+        start, stop = ptr[i], ptr[i + 1]
+        ptr[i] = end
+        for col in sorted(set(idx[start:stop])):
+            idx[end] = col
+            end += 1
+    ptr[size] = end
+    del idx[end:]
+    return ptr, idx
+
+
+def transpose(matrix, size):
+    """
+    Returns the (ptr, idx) CSR arrays of a transposed CSR matrix
+    with `size` columns.
+    """
+    ptr, idx = matrix
+    rows = array("i", bytes(4 * len(idx)))
+    for i in range(len(ptr) - 1):
+        for k in range(ptr[i], ptr[i + 1]):
+            rows[k] = i
+    return compress(idx, rows, size)
+
+
+def sorted_order(keys):
+    """
+    Returns an array of the positions of `keys`, in sorted key order.
+    """
+    return array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def deletions(name):
+    """
+    Returns the set of strings made by deleting at most one character
+    of `name`, `name` itself included.
+    """
+    return {name, *(name[:i] + name[i + 1:] for i in range(len(name)))}
+
+
+def deletion_bucket(string, buckets):
+    """
+    Returns the bucket of a string in a deletion index of `buckets`
+    buckets, by a hash that is the same in every process.
+    """
+    return zlib.crc32(string.encode("utf-8")) % buckets
+
+
+def deletion_index(lower_names, count):
+    """
+    Returns the (ptr, idx) CSR arrays of the deletion index of `count`
+    lowercase names: row b lists the people with a deletion of their
+    name in bucket b.
+    """
+    buckets = max(1, NAME_BUCKETS * count)
+    rows, cols = array("i"), array("i")
+    for person, name in enumerate(lower_names):
+        for deletion in deletions(name):
+            rows.append(deletion_bucket(deletion, buckets))
+            cols.append(person)
+    return compress(rows, cols, buckets)
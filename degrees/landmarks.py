@@ -0,0 +1,232 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from operator import add, sub
+
+from cache import load_graph, stamps
+
+# Name of the landmark index written next to the CSV files
+LANDMARKS_FILE = "landmarks.cache"
+
+# Bump whenever the layout below changes, so old indexes are rebuilt
+VERSION = 1
+
+MAGIC = b"DEGL"
+
+# Number of landmarks used when none is given
+LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Header: magic, version, (mtime_ns, size) for each CSV, landmarks, people
+HEADER = struct.Struct("<4sI6qII")
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+    graph = load_graph(directory)
+    index = build_landmarks(graph, count)
+    path = os.path.join(directory, LANDMARKS_FILE)
+    write_landmarks(index, path, stamps(directory))
+    print(f"Wrote {path}")
+
+
+class Landmarks():
+    """
+    Breadth first search distances from a few landmark people to
+    everyone else, one byte per (landmark, person).
+
+    By the triangle inequality, for any landmark l the distance between
+    two people a and b satisfies
+
+        |d(l, a) - d(l, b)| <= d(a, b) <= d(l, a) + d(l, b)
+
+    so each pair gets lower and upper bounds in O(landmarks) time.
+    """
+    def __init__(self, people, distances, size):
+        # Person integers of the landmarks, and their distances flattened
+        # so distances[l * size + person] is d(landmark l, person)
+        self.people = people
+        self.distances = distances
+        self.size = size
+
+    def __len__(self):
+        return len(self.people)
+
+    def bounds(self, a, b):
+        """
+        Returns (lower, upper) bounds on the number of degrees between
+        person integers `a` and `b`. `upper` is None when no landmark
+        reaches both, and both are None if they are not connected.
+        """
+        distances, size = self.distances, self.size
+        from_a, from_b = distances[a::size], distances[b::size]
+        if UNREACHABLE not in from_a and UNREACHABLE not in from_b:
+            # Every landmark reaches both, the common case
+            return (max(map(abs, map(sub, from_a, from_b)), default=0),
+                    min(map(add, from_a, from_b), default=None))
+
+        lower, upper = 0, None
+        for offset in range(0, len(distances), size):
+            from_a, from_b = distances[offset + a], distances[offset + b]
+            if from_a == UNREACHABLE or from_b == UNREACHABLE:
+                if from_a != from_b:
+                    return None, None
+                continue
+            lower = max(lower, abs(from_a - from_b))
+            if upper is None or from_a + from_b < upper:
+                upper = from_a + from_b
+        return lower, upper
+
+    def lower_bound(self, a, b):
+        """
+        Returns a lower bound on the degrees between person integers
+        `a` and `b`, or None if they are not connected.
+        """
+        return self.bounds(a, b)[0]
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the degrees from any
+        person integer to `target`, for A* search.
+
+        The target's distances are read once, and each person's come
+        from one strided slice of the index, so a bound is computed
+        without a Python loop over the landmarks. A landmark reaching
+        only one of the two contributes at least 1, which keeps the
+        bound admissible since such a person cannot reach the target.
+        """
+        size = self.size
+        row = self.distances[target::size]
+        distances = self.distances
+
+        def lower_bound(person):
+            return max(map(abs, map(sub, distances[person::size], row)), default=0)
+        return lower_bound
+
+    def estimate(self, graph, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two
+        IMDB person ids. Raises KeyError for an unknown person id.
+        """
+        return self.bounds(*graph.person_indices(source, target))
+
+
+def load_landmarks(directory, graph, count=LANDMARKS):
+    """
+    Returns the landmark index for a directory, memory-mapped from its
+    index file if that matches the CSV files, otherwise built from
+    `graph` and written to a fresh index file. If the index file cannot
+    be written, the index built is still returned.
+    """
+    path = os.path.join(directory, LANDMARKS_FILE)
+    index = read_landmarks(path, stamps(directory))
+    if index is None or len(index) != min(count, len(graph.person_ids)):
+        index = build_landmarks(graph, count)
+        try:
+            write_landmarks(index, path, stamps(directory))
+        except OSError:
+            pass
+    return index
+
+
+def build_landmarks(graph, count=LANDMARKS):
+    """
+    Returns a Landmarks index over the `count` people with the most
+    co-star appearances.
+    """
+    size = len(graph.person_ids)
+    people = array("i", sorted(range(size), key=lambda person: -costars(graph, person))[:count])
+    distances = array("B")
+    for landmark in people:
+        distances.extend(distances_from(graph, landmark))
+    return Landmarks(people, distances, size)
+
+
+def costars(graph, person):
+    """
+    Returns the number of co-star appearances of a person integer,
+    counting a co-star once per shared movie.
+    """
+    ptr, idx = graph.person_movies
+    movie_ptr = graph.movie_people[0]
+    return sum(
+        movie_ptr[idx[k] + 1] - movie_ptr[idx[k]]
+        for k in range(ptr[person], ptr[person + 1])
+    )
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of breadth first search distances from a person
+    integer to every person, capped at UNREACHABLE.
+    """
+    ptr, idx = graph.person_movies
+    movie_ptr, movie_idx = graph.movie_people
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    expanded = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    level = [source]
+    depth = 0
+    while level and depth + 1 < UNREACHABLE:
+        depth += 1
+        next_level = []
+        for person in level:
+            for k in range(ptr[person], ptr[person + 1]):
+                movie = idx[k]
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for j in range(movie_ptr[movie], movie_ptr[movie + 1]):
+                    neighbor = movie_idx[j]
+                    if distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = depth
+                        next_level.append(neighbor)
+        level = next_level
+    return distances
+
+
+def write_landmarks(index, path, source_stamps):
+    """
+    Writes a landmark index to a file, replacing any previous one.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *source_stamps, len(index), index.size))
+        f.write(index.people)
+        f.write(index.distances)
+    os.replace(temporary, path)
+
+
+def read_landmarks(path, source_stamps):
+    """
+    Returns the Landmarks memory-mapped from an index file, or None if
+    the file is missing, from another version, or built from other CSVs.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, version, *cached_stamps, count, size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or cached_stamps != source_stamps:
+            return None
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    start = HEADER.size
+    people = buffer[start:start + 4 * count].cast("i")
+    start += 4 * count
+    return Landmarks(people, buffer[start:start + count * size], size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import re
+from bisect import bisect_left
+
+from graph import deletion_bucket, deletions
+
+# Largest code point, sorts after any character that can follow a prefix
+LAST_CHARACTER = chr(0x10FFFF)
+
+# Default number of people returned by prefix and fuzzy lookups
+LIMIT = 10
+
+# "Name (1958)" asks for the person of that name born in 1958
+NAME_WITH_BIRTH = re.compile(r"^(.*?)\s*\((\d{4})\)\s*$")
+
+
+def with_prefix(graph, prefix, limit=LIMIT):
+    """
+    Returns the IMDB ids of up to `limit` people whose name starts
+    with `prefix`, ignoring case, in name order.
+    """
+    order, key = graph.people_by_name, graph.lower_name
+    prefix = prefix.lower()
+    start = bisect_left(order, prefix, key=key)
+    stop = bisect_left(order, prefix + LAST_CHARACTER, lo=start, key=key)
+    return [graph.person_ids[order[k]] for k in range(start, min(stop, start + limit))]
+
+
+def similar(graph, name, distance=1, limit=LIMIT):
+    """
+    Returns the IMDB ids of up to `limit` people whose name is within
+    `distance` edits (insertions, deletions or substitutions) of
+    `name`, ignoring case, in name order.
+
+    Within one edit, the people come from the graph's deletion index.
+    For larger distances, names are walked in sorted order as the
+    leaves of an implicit trie: edit distance rows are shared between
+    names with a common prefix, and once every entry of a row exceeds
+    `distance`, all names with that prefix are skipped with a binary
+    search. This walk takes milliseconds on a million names.
+    """
+    name = name.lower()
+    if distance <= 1:
+        return within_one_edit(graph, name, distance, limit)
+    order, key = graph.people_by_name, graph.lower_name
+
+    # rows[d] is the edit distance row of `name` against previous[:d]
+    rows = [list(range(len(name) + 1))]
+    previous = ""
+    person_ids = []
+    k = 0
+    while k < len(order) and len(person_ids) < limit:
+        candidate = key(order[k])
+        shared = common_prefix(previous, candidate, len(rows) - 1)
+        del rows[shared + 1:]
+
+        pruned = False
+        for depth in range(shared, len(candidate)):
+            rows.append(next_row(rows[-1], candidate[depth], name, distance))
+            if min(rows[-1]) > distance:
+                prefix = candidate[:depth + 1]
+                k = skip_prefix(order, key, prefix, k + 1)
+                previous = prefix
+                pruned = True
+                break
+        if pruned:
+            continue
+
+        if rows[-1][-1] <= distance:
+            person_ids.append(graph.person_ids[order[k]])
+        previous = candidate
+        k += 1
+    return person_ids
+
+
+def within_one_edit(graph, name, distance, limit):
+    """
+    Returns the IMDB ids of up to `limit` people whose lowercase name
+    is within `distance`, 0 or 1, edits of the lowercase `name`, in
+    name order.
+
+    Two strings are one edit apart exactly when deleting at most one
+    character from each makes them equal, so every match is in the
+    bucket of one of the deletions of `name`. The people in those
+    buckets are then checked against `name` itself.
+    """
+    ptr, idx = graph.name_deletions
+    buckets = len(ptr) - 1
+    candidates = set()
+    for deletion in (deletions(name) if distance == 1 else [name]):
+        bucket = deletion_bucket(deletion, buckets)
+        candidates.update(idx[ptr[bucket]:ptr[bucket + 1]])
+
+    matches = []
+    for person in candidates:
+        candidate = graph.lower_name(person)
+        if one_edit(candidate, name, distance):
+            matches.append((candidate, person))
+    matches.sort()
+    return [graph.person_ids[person] for _, person in matches[:limit]]
+
+
+def one_edit(a, b, distance=1):
+    """
+    Returns whether `a` and `b` are within `distance`, 0 or 1, edits.
+    """
+    if a == b:
+        return True
+    if distance == 0 or abs(len(a) - len(b)) > 1:
+        return False
+    i = common_prefix(a, b, min(len(a), len(b)))
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def skip_prefix(order, key, prefix, start):
+    """
+    Returns the first position from `start` on whose name does not
+    start with `prefix`. Gallops forward before the binary search,
+    since most prefixes deep in the trie cover only a few names.
+    """
+    end = prefix + LAST_CHARACTER
+    step = 1
+    low = start
+    while low + step - 1 < len(order) and key(order[low + step - 1]) < end:
+        low += step
+        step *= 2
+    return bisect_left(order, end, lo=low, hi=min(low + step, len(order)), key=key)
+
+
+def next_row(row, character, name, distance):
+    """
+    Returns the edit distance row after appending `character` to the
+    prefix that `row` was computed for. Only the band of cells within
+    `distance` of the diagonal is computed, the rest are capped at
+    `distance + 1`, which is all the search needs to know about them.
+    """
+    depth = row[0] + 1
+    cap = distance + 1
+    result = [cap] * len(row)
+    result[0] = depth
+    for i in range(max(1, depth - distance), min(len(name), depth + distance) + 1):
+        result[i] = min(
+            result[i - 1] + 1,
+            row[i] + 1,
+            row[i - 1] + (character != name[i - 1]),
+            cap,
+        )
+    return result
+
+
+def common_prefix(a, b, limit):
+    """
+    Returns the length of the common prefix of `a` and `b`, at most `limit`.
+    """
+    length = 0
+    for x, y in zip(a, b):
+        if length == limit or x != y:
+            break
+        length += 1
+    return length
+
+
+def split_birth(name):
+    """
+    Returns (name, birth) for "Name (year)", or (name, None).
+    """
+    match = NAME_WITH_BIRTH.match(name)
+    if match is None:
+        return name.strip(), None
+    return match.group(1), match.group(2)
+
+
+def resolve(graph, name, birth=None):
+    """
+    Returns (person_id, error) for a person's name without asking for
+    input. Ambiguous names are narrowed down by `birth` year, which may
+    also be given in the name itself as "Name (year)". `error`
+    describes why no single person matched, suggesting similar names
+    when there is no exact match.
+    """
+    name, given = split_birth(name)
+    birth = birth or given
+
+    person_ids = graph.people_named(name)
+    if birth is not None:
+        person_ids = [
+            person_id for person_id in person_ids
+            if graph.person(person_id)["birth"] == str(birth)
+        ]
+
+    if len(person_ids) == 1:
+        return person_ids[0], None
+    elif len(person_ids) > 1:
+        choices = ", ".join(
+            f"{person_id} (born {graph.person(person_id)['birth'] or 'unknown'})"
+            for person_id in person_ids
+        )
+        return None, f"{name} is ambiguous: {choices}"
+    elif birth is not None and graph.people_named(name):
+        return None, f"no {name} born in {birth}"
+
+    suggestions = sorted({
+        graph.person(person_id)["name"] for person_id in similar(graph, name)
+    })
+    if suggestions:
+        return None, f"{name} not found, did you mean: {', '.join(suggestions)}"
+    return None, f"{name} not found"
@@ -0,0 +1,161 @@
+# Default number of paths returned by k_shortest_paths
+LIMIT = 10
+
+
+class PathDAG():
+    """
+    Every shortest path between two people, as a predecessor DAG.
+
+    The DAG is bipartite like the graph itself: `people[person]` lists
+    the movies that reach `person` from the previous level, and
+    `movies[movie]` lists the people of that previous level who
+    starred in it. Its size is bounded by the edges a breadth first
+    search explores, however many paths it holds.
+    """
+    def __init__(self, graph, source, target, length, people, movies):
+        self.graph = graph
+        self.source = source
+        self.target = target
+        self.length = length
+        self.people = people
+        self.movies = movies
+
+    def count(self):
+        """
+        Returns the number of shortest paths, one per distinct
+        sequence of (movie, person) steps.
+        """
+        counts = {self.source: 1}
+
+        # Recursion only goes as deep as the path length
+        def paths_to(person):
+            if person not in counts:
+                counts[person] = sum(
+                    paths_to(parent)
+                    for movie in self.people[person]
+                    for parent in self.movies[movie]
+                )
+            return counts[person]
+
+        return paths_to(self.target)
+
+    def paths(self, limit=LIMIT):
+        """
+        Returns up to `limit` shortest paths as lists of
+        (movie_id, person_id) pairs, in a deterministic order.
+        """
+        graph = self.graph
+        result = []
+
+        # Walk backwards from the target, choosing a movie and then a
+        # co-star of the previous level at every step
+        stack = [(self.target, [])]
+        while stack and len(result) < limit:
+            person, steps = stack.pop()
+            if person == self.source:
+                result.append([
+                    (graph.movie_ids[movie], graph.person_ids[star])
+                    for movie, star in reversed(steps)
+                ])
+                continue
+            for movie in reversed(self.people[person]):
+                for parent in reversed(self.movies[movie]):
+                    stack.append((parent, steps + [(movie, person)]))
+        return result
+
+    def as_ids(self):
+        """
+        Returns the DAG with IMDB ids, for JSON output.
+        """
+        graph = self.graph
+        return {
+            "people": {
+                graph.person_ids[person]: [graph.movie_ids[movie] for movie in movies]
+                for person, movies in self.people.items()
+            },
+            "movies": {
+                graph.movie_ids[movie]: [graph.person_ids[person] for person in people]
+                for movie, people in self.movies.items()
+            },
+        }
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Returns a PathDAG of all shortest paths between two IMDB person ids,
+    computed in one breadth first sweep, or None if not connected.
+    Raises KeyError for an unknown person id.
+    """
+    return shortest_path_dag(graph, *graph.person_indices(source, target))
+
+
+def k_shortest_paths(graph, source, target, k=LIMIT):
+    """
+    Returns up to `k` shortest lists of (movie_id, person_id) pairs
+    connecting two IMDB person ids. All returned paths have the
+    shortest length; fewer than `k` come back when fewer exist.
+    """
+    dag = all_shortest_paths(graph, source, target)
+    if dag is None:
+        return []
+    return dag.paths(k)
+
+
+def shortest_path_dag(graph, source, target):
+    """
+    Breadth first sweep over person integers that stops after the
+    level containing `target`, recording every predecessor.
+
+    Each movie is expanded once, at the level of its first star to be
+    expanded: its stars on that level are the movie's predecessors and
+    its stars on the next level gain the movie as a predecessor.
+    Returns a PathDAG pruned to the paths ending at `target`, or None.
+    """
+    ptr, idx = graph.person_movies
+    movie_ptr, movie_idx = graph.movie_people
+    if source == target:
+        return PathDAG(graph, source, target, 0, {}, {})
+
+    distance = {source: 0}
+    person_movies = {}
+    movie_people = {}
+    level = [source]
+    depth = 0
+    while level and target not in distance:
+        next_level = []
+        for person in level:
+            for k in range(ptr[person], ptr[person + 1]):
+                movie = idx[k]
+                if movie in movie_people:
+                    continue
+                stars = movie_idx[movie_ptr[movie]:movie_ptr[movie + 1]]
+                movie_people[movie] = [
+                    star for star in stars if distance.get(star) == depth
+                ]
+                for star in stars:
+                    reached = distance.get(star)
+                    if reached is None:
+                        distance[star] = depth + 1
+                        person_movies[star] = [movie]
+                        next_level.append(star)
+                    elif reached == depth + 1:
+                        person_movies[star].append(movie)
+        level = next_level
+        depth += 1
+
+    if target not in distance:
+        return None
+
+    # Keep only the part of the DAG that leads to the target
+    people, movies = {}, {}
+    pending = [target]
+    while pending:
+        person = pending.pop()
+        if person == source or person in people:
+            continue
+        people[person] = person_movies[person]
+        for movie in people[person]:
+            if movie not in movies:
+                movies[movie] = movie_people[movie]
+                pending.extend(movies[movie])
+    return PathDAG(graph, source, target, distance[target], people, movies)
@@ -0,0 +1,100 @@
+from cache import load_graph
+from names import resolve
+from paths import LIMIT, all_shortest_paths
+
+# Graph loaded by each worker process of a query pool
+worker_graph = None
+
+
+def answer(graph, source_name, target_name):
+    """
+    Returns a dictionary describing the shortest path between two
+    people given by name, suitable for JSON output. A name may end
+    with a birth year, as in "Kevin Bacon (1958)", to pick between
+    people with the same name.
+    """
+    result = {"source": source_name, "target": target_name}
+    source, error = resolve(graph, source_name)
+    if error is None:
+        target, error = resolve(graph, target_name)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    path = graph.shortest_path(source, target, "bidirectional")
+    if path is None:
+        result["degrees"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {"movie": graph.movie(movie_id)["title"],
+         "person": graph.person(person_id)["name"]}
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def answer_paths(graph, source_name, target_name, limit=LIMIT):
+    """
+    Returns a dictionary with the number of shortest paths between two
+    people given by name and up to `limit` of them, suitable for JSON
+    output.
+    """
+    result = {"source": source_name, "target": target_name}
+    source, error = resolve(graph, source_name)
+    if error is None:
+        target, error = resolve(graph, target_name)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    dag = all_shortest_paths(graph, source, target)
+    if dag is None:
+        result["degrees"] = None
+        return result
+
+    result["degrees"] = dag.length
+    result["count"] = dag.count()
+    result["paths"] = [
+        [{"movie": graph.movie(movie_id)["title"],
+          "person": graph.person(person_id)["name"]}
+         for movie_id, person_id in path]
+        for path in dag.paths(limit)
+    ]
+    return result
+
+
+def answer_estimate(graph, index, source_name, target_name):
+    """
+    Returns a dictionary with lower and upper bounds on the degrees
+    between two people given by name, from a `landmarks.Landmarks`
+    index, suitable for JSON output. Both bounds are None if the two
+    are not connected, and `upper` is None if no landmark reaches both.
+    """
+    result = {"source": source_name, "target": target_name}
+    source, error = resolve(graph, source_name)
+    if error is None:
+        target, error = resolve(graph, target_name)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    result["lower"], result["upper"] = index.estimate(graph, source, target)
+    return result
+
+
+def init_worker(directory):
+    """
+    Pool initializer: memory-maps the graph once per worker process.
+    All workers share the cached file through the page cache.
+    """
+    global worker_graph
+    worker_graph = load_graph(directory)
+
+
+def answer_in_worker(pair):
+    """
+    Answers a (source, target) name pair in a pool worker.
+    """
+    return answer(worker_graph, *pair)
@@ -0,0 +1,210 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+from urllib.parse import parse_qs, urlparse
+
+from cache import load_graph
+from landmarks import load_landmarks
+from paths import LIMIT
+from query import answer, answer_estimate, answer_in_worker, answer_paths, init_worker
+
+# Default port the server listens on, on localhost only
+PORT = 8050
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python server.py directory [port] [processes]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) >= 3 else PORT
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else 1
+
+    print("Loading data...")
+    server = QueryServer(("127.0.0.1", port), directory, processes)
+    print(f"Serving on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class QueryServer(ThreadingHTTPServer):
+    """
+    HTTP server that keeps one graph loaded for all requests.
+
+        GET  /query?source=NAME&target=NAME   one answer
+        GET  /paths?source=NAME&target=NAME&limit=K
+                                              all shortest paths, up to K
+        POST /batch  [[source, target], ...]  list of answers
+        GET  /estimate?source=NAME&target=NAME
+                                              landmark bounds on the degrees
+        POST /estimates  [[source, target], ...]
+                                              list of landmark bounds
+        GET  /stats                           query count and throughput,
+                                              over every kind of query
+
+    With more than one process, queries are answered by a pool of
+    workers sharing the memory-mapped graph cache. The landmark index
+    is loaded, or built, on the first estimate.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, directory, processes=1):
+        super().__init__(address, QueryHandler)
+        self.directory = directory
+        self.graph = load_graph(directory)
+        self.index = None
+        self.index_lock = threading.Lock()
+        self.pool = None
+        if processes > 1:
+            self.pool = Pool(processes, initializer=init_worker, initargs=(directory,))
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+
+    def answer_all(self, pairs):
+        """
+        Returns the answers for a list of (source, target) pairs.
+        """
+        start = time.perf_counter()
+        if self.pool is not None:
+            results = self.pool.map(answer_in_worker, pairs)
+        else:
+            results = [answer(self.graph, *pair) for pair in pairs]
+        self.record(len(pairs), start)
+        return results
+
+    def estimate_all(self, pairs):
+        """
+        Returns landmark bounds for a list of (source, target) pairs.
+        """
+        start = time.perf_counter()
+        with self.index_lock:
+            if self.index is None:
+                self.index = load_landmarks(self.directory, self.graph)
+        results = [answer_estimate(self.graph, self.index, *pair) for pair in pairs]
+        self.record(len(pairs), start)
+        return results
+
+    def all_paths(self, source, target, limit):
+        """
+        Returns all shortest paths between two people, up to `limit`.
+        """
+        start = time.perf_counter()
+        result = answer_paths(self.graph, source, target, limit)
+        self.record(1, start)
+        return result
+
+    def record(self, queries, start):
+        """
+        Adds `queries` answered since `start` to the stats.
+        """
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.queries += queries
+            self.busy += elapsed
+
+    def stats(self):
+        """
+        Returns the number of queries answered and the throughput, both
+        over the server's uptime and over time spent answering.
+        """
+        with self.lock:
+            queries, busy = self.queries, self.busy
+        uptime = time.perf_counter() - self.started
+        return {
+            "queries": queries,
+            "uptime": uptime,
+            "queries_per_second": queries / uptime if uptime else 0,
+            "busy_queries_per_second": queries / busy if busy else 0,
+        }
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            self.pool.terminate()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_json(200, self.server.stats())
+        elif url.path == "/query":
+            params = parse_qs(url.query)
+            if "source" not in params or "target" not in params:
+                self.send_json(400, {"error": "source and target are required"})
+                return
+            pair = (params["source"][0], params["target"][0])
+            self.send_json(200, self.server.answer_all([pair])[0])
+        elif url.path == "/estimate":
+            params = parse_qs(url.query)
+            if "source" not in params or "target" not in params:
+                self.send_json(400, {"error": "source and target are required"})
+                return
+            pair = (params["source"][0], params["target"][0])
+            self.send_json(200, self.server.estimate_all([pair])[0])
+        elif url.path == "/paths":
+            params = parse_qs(url.query)
+            if "source" not in params or "target" not in params:
+                self.send_json(400, {"error": "source and target are required"})
+                return
+            try:
+                limit = int(params.get("limit", [LIMIT])[0])
+                if limit < 1:
+                    raise ValueError("limit below 1")
+            except ValueError:
+                self.send_json(400, {"error": "limit must be a positive number"})
+                return
+            self.send_json(200, self.server.all_paths(
+                params["source"][0], params["target"][0], limit
+            ))
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path not in ["/batch", "/estimates"]:
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            pairs = json.loads(self.rfile.read(length))
+            if not isinstance(pairs, list) or not all(
+                isinstance(pair, list) and len(pair) == 2
+                and all(isinstance(name, str) for name in pair)
+                for pair in pairs
+            ):
+                raise ValueError("expected pairs of names")
+            pairs = [tuple(pair) for pair in pairs]
+        except (ValueError, TypeError):
+            self.send_json(400, {"error": "expected a JSON list of [source, target] pairs"})
+            return
+        if path == "/estimates":
+            self.send_json(200, self.server.estimate_all(pairs))
+        else:
+            self.send_json(200, self.server.answer_all(pairs))
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -5,14 +8,26 @@ class Node():
         self.action = action
 
 class StackFrontier():
+    """
+    Last-in first-out frontier.
+
+    Nodes live in a deque so adding and removing at either end is O(1),
+    and a companion count of states makes `contains_state` a hash lookup
+    instead of a scan over the whole frontier.
+    """
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
 
     def add(self, node):
         self.frontier.append(node)
+        self._track(node)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -21,19 +36,35 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._untrack(node)
             return node
 
     def insert(self, idx, node):
-        self.frontier.insert(idx,node)
+        if idx == 0:
+            self.frontier.appendleft(node)
+        else:
+            self.frontier.insert(idx, node)
+        self._track(node)
 
-class QueueFrontier(StackFrontier):
+    def _track(self, node):
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _untrack(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
 
+class QueueFrontier(StackFrontier):
+    """
+    First-in first-out frontier with the same contract as StackFrontier.
+    """
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._untrack(node)
             return node
@@ -1,10 +1,59 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Logical sentences are immutable and hash-consed: building a sentence
+    equal to one that exists returns that same object, so equal
+    subformulas are shared. Equal sentences being the same object, they
+    compare and hash by identity, which never looks at their operands.
+    Each sentence keeps its set of symbols once asked for.
+    """
 
-    def evaluate(self, model):
-        """Evaluates the logical sentence."""
+    __slots__ = ("arguments", "symbol_set", "__weakref__")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Every sentence of the class alive, by arguments
+        cls.interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, arguments, **fields):
+        """Returns the sentence of a class and arguments, building it the
+        first time."""
+        sentence = cls.interned.get(arguments)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "arguments", arguments)
+            object.__setattr__(sentence, "symbol_set", None)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            cls.interned[arguments] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("logical sentences cannot be changed")
+
+    def __reduce__(self):
+        return (type(self), self.arguments)
+
+    def evaluate(self, model, memo=None):
+        """Evaluates the logical sentence, each subformula once per model."""
+        if memo is None:
+            memo = {}
+        try:
+            return memo[self]
+        except KeyError:
+            value = memo[self] = self.truth(model, memo)
+            return value
+
+    def truth(self, model, memo):
+        """Evaluates the logical sentence, given its subformulas' memo."""
         raise Exception("nothing to evaluate")
 
     def formula(self):
@@ -12,8 +61,12 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if self.symbol_set is None:
+            object.__setattr__(self, "symbol_set", frozenset().union(
+                *[argument.symbols() for argument in self.arguments]
+            ))
+        return self.symbol_set
 
     @classmethod
     def validate(cls, sentence):
@@ -44,19 +97,15 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    __slots__ = ("name",)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern((name,), name=name)
 
     def __repr__(self):
         return self.name
 
-    def evaluate(self, model):
+    def evaluate(self, model, memo=None):
         try:
             return bool(model[self.name])
         except KeyError:
@@ -66,46 +115,37 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        if self.symbol_set is None:
+            object.__setattr__(self, "symbol_set", frozenset([self.name]))
+        return self.symbol_set
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
 
-    def evaluate(self, model):
-        return not self.operand.evaluate(model)
+    def truth(self, model, memo):
+        return not self.operand.evaluate(model, memo)
 
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        return cls.intern(conjuncts, conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,11 +154,14 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Sentences cannot be changed, so conjuncts cannot be added."""
+        raise AttributeError(
+            "logical sentences cannot be changed, "
+            "build And(*knowledge.conjuncts, sentence) instead"
+        )
 
-    def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+    def truth(self, model, memo):
+        return all(conjunct.evaluate(model, memo) for conjunct in self.conjuncts)
 
     def formula(self):
         if len(self.conjuncts) == 1:
@@ -126,30 +169,22 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        return cls.intern(disjuncts, disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
-    def evaluate(self, model):
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
+    def truth(self, model, memo):
+        return any(disjunct.evaluate(model, memo) for disjunct in self.disjuncts)
 
     def formula(self):
         if len(self.disjuncts) == 1:
@@ -157,77 +192,179 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    __slots__ = ("antecedent", "consequent")
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __new__(cls, antecedent, consequent):
+        Sentence.validate(antecedent)
+        Sentence.validate(consequent)
+        return cls.intern((antecedent, consequent),
+                          antecedent=antecedent, consequent=consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
 
-    def evaluate(self, model):
-        return ((not self.antecedent.evaluate(model))
-                or self.consequent.evaluate(model))
+    def truth(self, model, memo):
+        return ((not self.antecedent.evaluate(model, memo))
+                or self.consequent.evaluate(model, memo))
 
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    __slots__ = ("left", "right")
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __new__(cls, left, right):
+        Sentence.validate(left)
+        Sentence.validate(right)
+        return cls.intern((left, right), left=left, right=right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
-    def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+    def truth(self, model, memo):
+        return (self.left.evaluate(model, memo)
+                == self.right.evaluate(model, memo))
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+
+# Instructions of compiled sentences
+NOT, AND, OR, IMPLIES, IFF = range(5)
+
+# Models evaluated at once by a compiled sentence, as a power of two
+CHUNK_BITS = 16
+
+
+class Program():
+    """
+    Logical sentences compiled to a flat list of instructions over
+    truth tables.
+
+    The truth table of a sentence is an integer whose bit m is set if
+    the sentence is true in model m, where symbol i is true in model m
+    if bit i of m is set. Each instruction combines the truth tables of
+    earlier ones with one bitwise operation, so a run evaluates the
+    sentences in 2 ** CHUNK_BITS models at once. Models with more
+    symbols than that are run in chunks, with the later symbols fixed
+    to true or false in each chunk. Subformulas that are equal are
+    compiled once.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.width = min(len(self.symbols), CHUNK_BITS)
+        self.mask = (1 << (1 << self.width)) - 1
+        self.chunks = 1 << (len(self.symbols) - self.width)
+        self.instructions = []
+
+        # Slot of each compiled sentence; the first slots hold the symbols
+        self.slots = {
+            symbol: slot for slot, symbol in enumerate(self.symbols)
+        }
+
+        # Truth tables of the symbols that vary within a chunk
+        self.patterns = []
+        for i in range(self.width):
+            pattern = ((1 << (1 << i)) - 1) << (1 << i)
+            period = 1 << (i + 1)
+            while period < 1 << self.width:
+                pattern |= pattern << period
+                period *= 2
+            self.patterns.append(pattern)
+
+    def add(self, sentence):
+        """Compiles a sentence and returns the slot of its truth table."""
+        if isinstance(sentence, Symbol):
+            return self.slots[sentence.name]
+        if sentence in self.slots:
+            return self.slots[sentence]
+
+        if isinstance(sentence, Not):
+            instruction = (NOT, (self.add(sentence.operand),))
+        elif isinstance(sentence, And):
+            instruction = (AND, tuple(self.add(conjunct)
+                                      for conjunct in sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            instruction = (OR, tuple(self.add(disjunct)
+                                     for disjunct in sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, (self.add(sentence.antecedent),
+                                     self.add(sentence.consequent)))
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, (self.add(sentence.left),
+                                 self.add(sentence.right)))
+        else:
+            raise TypeError(f"cannot compile {sentence}")
+
+        self.instructions.append(instruction)
+        self.slots[sentence] = len(self.symbols) + len(self.instructions) - 1
+        return self.slots[sentence]
+
+    def run(self, chunk=0):
+        """Returns the truth tables of every slot in a chunk of models."""
+        mask = self.mask
+        values = list(self.patterns)
+        for i in range(len(self.symbols) - self.width):
+            values.append(mask if chunk >> i & 1 else 0)
+
+        for operation, operands in self.instructions:
+            if operation == NOT:
+                value = mask ^ values[operands[0]]
+            elif operation == AND:
+                value = mask
+                for operand in operands:
+                    value &= values[operand]
+            elif operation == OR:
+                value = 0
+                for operand in operands:
+                    value |= values[operand]
+            elif operation == IMPLIES:
+                value = (mask ^ values[operands[0]]) | values[operands[1]]
+            else:
+                value = mask ^ values[operands[0]] ^ values[operands[1]]
+            values.append(value)
+        return values
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
+    # Get all symbols in both knowledge and query
+    symbols = knowledge.symbols() | query.symbols()
+
+    # Knowledge base entails query if no model makes knowledge true
+    # and query false
+    program = Program(sorted(symbols))
+    knowledge_slot = program.add(knowledge)
+    query_slot = program.add(query)
+    for chunk in range(program.chunks):
+        values = program.run(chunk)
+        if values[knowledge_slot] & ~values[query_slot]:
+            return False
+    return True
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, with the SAT solver of
+    sat.py, for knowledge bases with too many symbols to check every
+    model."""
+    from sat import entails
+    return entails(knowledge, query)
+
+
+def model_check_recursive(knowledge, query):
+    """Checks if knowledge base entails query, one model at a time."""
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
@@ -257,7 +394,7 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
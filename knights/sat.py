@@ -0,0 +1,344 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, and the growth of that interval
+RESTART = 100
+RESTART_GROWTH = 1.5
+
+# Decay of the activity of variables that stop appearing in conflicts
+DECAY = 0.95
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query, by showing that knowledge
+    and not query cannot both be true."""
+    cnf = CNF()
+    cnf.assert_sentence(knowledge)
+    cnf.assert_sentence(Not(query))
+    return not Solver(cnf.clauses, cnf.count).solve()
+
+
+def satisfiable(sentence):
+    """Returns a model of the sentence, as a dict from symbol names to
+    truth values, or None if there is none."""
+    cnf = CNF()
+    cnf.assert_sentence(sentence)
+    solver = Solver(cnf.clauses, cnf.count)
+    if not solver.solve():
+        return None
+    return {
+        name: solver.assignment[variable] > 0
+        for name, variable in cnf.variables.items()
+    }
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form equisatisfiable with the asserted
+    sentences, by the Tseitin transformation.
+
+    Every symbol is a variable numbered from 1, and literals are the
+    variable or its negative. Each compound subformula gets a variable
+    of its own, with clauses stating that it is equivalent to its
+    connective applied to its operands, so the clauses grow linearly
+    with the sentences. Negations are negated literals rather than new
+    variables, and equal subformulas share a variable.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+        self.variables = {}
+
+        # Literal of each compound subformula encoded so far
+        self.literals = {}
+
+    def variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        return self.count
+
+    def assert_sentence(self, sentence):
+        """Adds clauses that are satisfiable only if the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns the literal that is true if the sentence is."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.variable()
+            return self.variables[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            operands = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            x = self.variable()
+            self.clauses.extend([-x, operand] for operand in operands)
+            self.clauses.append([x] + [-operand for operand in operands])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                operands = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            else:
+                operands = [-self.literal(sentence.antecedent),
+                            self.literal(sentence.consequent)]
+            x = self.variable()
+            self.clauses.append([-x] + operands)
+            self.clauses.extend([x, -operand] for operand in operands)
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            x = self.variable()
+            self.clauses.extend([
+                [-x, -left, right], [-x, left, -right],
+                [x, left, right], [x, -left, -right],
+            ])
+        else:
+            raise TypeError(f"cannot convert {sentence} to CNF")
+
+        self.literals[sentence] = x
+        return x
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Unit propagation watches two literals of every clause, so a clause
+    is only looked at when one of its watched literals becomes false.
+    Each conflict is analysed back to its first unique implication
+    point, and the clause learned from it is added before jumping back
+    to the level where it becomes unit. Decisions take the unassigned
+    variable most active in recent conflicts, with the value it last
+    had, and the search restarts after a growing number of conflicts.
+    """
+
+    def __init__(self, clauses, count):
+        self.count = count
+        self.clauses = []
+        self.watches = {
+            literal: [] for variable in range(1, count + 1)
+            for literal in (variable, -variable)
+        }
+
+        # Value (1, -1 or 0 if unassigned), decision level and reason
+        # clause of each variable, and the assigned literals in order
+        self.assignment = [0] * (count + 1)
+        self.level = [0] * (count + 1)
+        self.reason = [None] * (count + 1)
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+        self.phase = [-1] * (count + 1)
+        self.queue = [(0.0, variable) for variable in range(1, count + 1)]
+
+        self.conflicts = 0
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        """Returns 1 if the literal is true, -1 if false, 0 if unassigned."""
+        value = self.assignment[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """Adds a clause of the problem, before solving."""
+        literals = set(clause)
+        if any(-literal in literals for literal in literals):
+            return
+        clause = [literal for literal in literals if self.value(literal) >= 0]
+        if any(self.value(literal) > 0 for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores a clause of at least two literals, watching its first two."""
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        """Makes a literal true at the current level."""
+        variable = abs(literal)
+        self.assignment[variable] = 1 if literal > 0 else -1
+        self.level[variable] = len(self.limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Assigns every literal implied by unit clauses, and returns the
+        index of a clause that became false, or None."""
+        assignment = self.assignment
+        clauses = self.clauses
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = watches[false]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                value = assignment[abs(first)]
+                if (value if first > 0 else -value) > 0:
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for j in range(2, len(clause)):
+                    literal = clause[j]
+                    value = assignment[abs(literal)]
+                    if (value if literal > 0 else -value) >= 0:
+                        clause[1], clause[j] = literal, false
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    value = assignment[abs(first)]
+                    if value == 0:
+                        self.assign(first, index)
+                    else:
+                        kept.extend(watching[position + 1:])
+                        watches[false] = kept
+                        return index
+            watches[false] = kept
+        return None
+
+    def analyse(self, conflict):
+        """Returns (clause, level): the clause learned from a conflict,
+        its literal of the current level first, and the level to jump
+        back to."""
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.level[variable] > 0:
+                    seen.add(variable)
+                    self.bump_activity(variable)
+                    if self.level[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve with the reason of the latest literal involved
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal of the highest remaining level second
+        highest = max(range(1, len(learned)),
+                      key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump_activity(self, variable):
+        """Raises the activity of a variable found in a conflict."""
+        self.activity[variable] += self.bump
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+            self.queue = [(-self.activity[variable], variable)
+                          for variable in range(1, self.count + 1)
+                          if self.assignment[variable] == 0]
+            heapq.heapify(self.queue)
+        elif self.assignment[variable] == 0:
+            heapq.heappush(self.queue, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Unassigns every literal above a decision level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = self.assignment[variable]
+            self.assignment[variable] = 0
+            self.reason[variable] = None
+            heapq.heappush(self.queue, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def decide(self):
+        """Returns the literal to assign next, or None if all are."""
+        while self.queue:
+            activity, variable = heapq.heappop(self.queue)
+            if self.assignment[variable] == 0 and -activity == self.activity[variable]:
+                return variable * self.phase[variable]
+        for variable in range(1, self.count + 1):
+            if self.assignment[variable] == 0:
+                return variable * self.phase[variable]
+        return None
+
+    def solve(self):
+        """Returns True if the clauses are satisfiable, leaving a model of
+        them in `assignment`, and False otherwise."""
+        if self.unsatisfiable:
+            return False
+        restart = RESTART
+        since_restart = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.unsatisfiable = True
+                    return False
+                self.conflicts += 1
+                since_restart += 1
+                learned, level = self.analyse(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.bump /= DECAY
+                continue
+
+            if since_restart >= restart:
+                self.backtrack(0)
+                since_restart = 0
+                restart *= RESTART_GROWTH
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(literal, None)
@@ -0,0 +1,183 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import crawler
+import pagerank
+from engine import SOLVERS
+
+# Sizes (number of pages) used when none are given on the command line
+SIZES = [1000, 10000, 100000]
+
+# Random surfer steps sampled per page of the corpus
+SAMPLES_PER_PAGE = 100
+
+# Largest number of links of a page in the power-law corpora
+MAX_LINKS = 100
+
+# Pages per component of the disconnected corpora
+COMPONENT_SIZE = 50
+
+# Share of pages without links in the dangling-heavy corpora
+DANGLING_SHARE = 0.5
+
+# Share of pages that link to themselves in the self-link corpora
+SELF_LINK_SHARE = 0.3
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if argument != "--json"]
+    if not arguments or arguments[0] not in [*CORPORA, "all"]:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(CORPORA)}|all] "
+                 "[size ...] [--json]")
+    kinds = list(CORPORA) if arguments[0] == "all" else [arguments[0]]
+    sizes = [int(size) for size in arguments[1:]] or SIZES
+    as_json = "--json" in sys.argv
+
+    if not as_json:
+        print(f"{'corpus':>12} {'pages':>8} {'links':>9} {'phase':>22} "
+              f"{'seconds':>9} {'l1 error':>9} {'max error':>9}")
+    for kind in kinds:
+        for size in sizes:
+            for result in run(kind, size):
+                if as_json:
+                    print(json.dumps(result))
+                else:
+                    print(f"{result['corpus']:>12} {result['pages']:>8} "
+                          f"{result['links']:>9} {result['phase']:>22} "
+                          f"{result['seconds']:>9.3f} "
+                          f"{result.get('l1_error', ''):>9.4} "
+                          f"{result.get('max_error', ''):>9.4}")
+
+
+def power_law_corpus(size, rng):
+    """
+    Returns a corpus of `size` pages whose number of links follows a
+    power law, linking mostly to a few popular pages.
+    """
+    pages = [f"{i}.html" for i in range(size)]
+    corpus = {}
+    for page in pages:
+        count = min(int(rng.paretovariate(1.2)), MAX_LINKS, size - 1)
+        corpus[page] = {pages[int(size * rng.random() ** 3)] for _ in range(count)}
+        corpus[page].discard(page)
+    return corpus
+
+
+def disconnected_corpus(size, rng):
+    """
+    Returns a corpus of `size` pages split into components of
+    COMPONENT_SIZE pages that only link within their own component.
+    """
+    pages = [f"{i}.html" for i in range(size)]
+    corpus = {}
+    for start in range(0, size, COMPONENT_SIZE):
+        component = pages[start:start + COMPONENT_SIZE]
+        for page in component:
+            count = rng.randint(1, min(5, len(component)))
+            corpus[page] = set(rng.sample(component, count)) - {page}
+    return corpus
+
+
+def dangling_corpus(size, rng):
+    """
+    Returns a power-law corpus of `size` pages in which DANGLING_SHARE
+    of the pages have no links at all.
+    """
+    corpus = power_law_corpus(size, rng)
+    for page in corpus:
+        if rng.random() < DANGLING_SHARE:
+            corpus[page] = set()
+    return corpus
+
+
+def self_link_corpus(size, rng):
+    """
+    Returns a power-law corpus of `size` pages in which SELF_LINK_SHARE
+    of the pages also link to themselves.
+    """
+    corpus = power_law_corpus(size, rng)
+    for page in corpus:
+        if rng.random() < SELF_LINK_SHARE:
+            corpus[page].add(page)
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Writes a corpus as one HTML file per page to `directory`.
+    """
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write("<!DOCTYPE html>\n<html>\n<body>\n")
+            for link in sorted(links):
+                f.write(f'<a href="{link}">{link}</a>\n')
+            f.write("</body>\n</html>\n")
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of calling `function`.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def errors(estimate, ranks):
+    """
+    Returns the L1 and largest absolute difference between two rankings.
+    """
+    differences = [abs(estimate.get(page, 0) - rank) for page, rank in ranks.items()]
+    return sum(differences), max(differences)
+
+
+def run(kind, size, seed=0):
+    """
+    Yields one result dictionary per phase for a synthetic corpus:
+    crawling it from HTML files, serially and in parallel, sampling
+    PageRank and iterating it with every solver. Sampled and iterated
+    ranks are compared with the ranks of the power iteration.
+    """
+    corpus = CORPORA[kind](size, random.Random(seed))
+    links = sum(len(page_links) for page_links in corpus.values())
+    base = {"corpus": kind, "pages": size, "links": links}
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(corpus, directory)
+        crawled, seconds = timed(pagerank.crawl, directory)
+        yield {**base, "phase": "crawl", "seconds": seconds}
+        _, seconds = timed(crawler.crawl_parallel, directory)
+        yield {**base, "phase": "crawl-parallel", "seconds": seconds}
+
+    ranks, seconds = timed(pagerank.iterate_pagerank, crawled, pagerank.DAMPING)
+    yield {**base, "phase": "iterate/power", "seconds": seconds}
+    for method in SOLVERS:
+        if method == "power":
+            continue
+        estimate, seconds = timed(pagerank.iterate_pagerank, crawled,
+                                  pagerank.DAMPING, method=method)
+        l1_error, max_error = errors(estimate, ranks)
+        yield {**base, "phase": f"iterate/{method}", "seconds": seconds,
+               "l1_error": l1_error, "max_error": max_error}
+
+    samples = SAMPLES_PER_PAGE * size
+    estimate, seconds = timed(pagerank.sample_pagerank, crawled, pagerank.DAMPING, samples)
+    l1_error, max_error = errors(estimate, ranks)
+    yield {**base, "phase": "sample", "seconds": seconds, "samples": samples,
+           "l1_error": l1_error, "max_error": max_error}
+
+
+CORPORA = {
+    "powerlaw": power_law_corpus,
+    "disconnected": disconnected_corpus,
+    "dangling": dangling_corpus,
+    "selflinks": self_link_corpus,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import os
+import re
+import struct
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from engine import LinkGraph
+
+# Same link pattern as pagerank.crawl
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Files handed to a pool worker at a time
+CHUNK_SIZE = 256
+
+# Bump whenever the layout below changes
+VERSION = 1
+
+MAGIC = b"PRLK"
+
+# Header: magic, version, page count, edge count, bytes of page names
+HEADER = struct.Struct("<4sIqqq")
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python crawler.py corpus edges [processes]")
+    processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    start = time.perf_counter()
+    graph = crawl_parallel(sys.argv[1], processes)
+    elapsed = time.perf_counter() - start
+    write_edges(graph, sys.argv[2])
+
+    rate = len(graph) / elapsed if elapsed else 0
+    print(f"{len(graph)} pages, {len(graph.indices)} links in {elapsed:.2f}s "
+          f"({rate:.0f} pages/second)")
+    print(f"Wrote {sys.argv[2]}")
+
+
+def page_links(directory, filename):
+    """
+    Returns (filename, links) for an HTML page, without links to itself.
+    """
+    with open(os.path.join(directory, filename)) as f:
+        links = set(LINK.findall(f.read())) - {filename}
+    return filename, links
+
+
+def crawl_parallel(directory, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Parses a directory of HTML pages with a pool of `processes` workers
+    and returns its LinkGraph, equivalent to `crawl` followed by
+    `LinkGraph.from_corpus` but with pages in name order.
+
+    Page names are interned to integers before parsing starts, so
+    workers only send back each page's link names and the links are
+    turned into sorted id arrays as results stream in.
+    """
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    number = {page: i for i, page in enumerate(pages)}
+    links = [None] * len(pages)
+
+    parse = partial(page_links, directory)
+    with Pool(processes) as pool:
+        for page, names in pool.imap_unordered(parse, pages, chunk_size):
+            links[number[page]] = np.array(
+                sorted(number[name] for name in names if name in number),
+                dtype=np.int64,
+            )
+
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum([len(targets) for targets in links], out=indptr[1:])
+    indices = np.concatenate(links) if links else np.zeros(0, dtype=np.int64)
+    return LinkGraph(pages, indptr, indices)
+
+
+def write_edges(graph, path):
+    """
+    Writes a LinkGraph to an edge list file, replacing any previous one.
+
+    After the header come the page name offsets and the UTF-8 page
+    names, then, 8-byte aligned, (source, target) int32 pairs sorted by
+    source and target.
+    """
+    encoded = [page.encode("utf-8") for page in graph.pages]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=offsets[1:])
+    names = b"".join(encoded)
+
+    edges = np.empty((len(graph.indices), 2), dtype=np.int32)
+    edges[:, 0] = np.repeat(np.arange(len(graph)), np.diff(graph.indptr))
+    edges[:, 1] = graph.indices
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(graph), len(edges), len(names)))
+        f.write(offsets.tobytes())
+        f.write(names)
+        f.write(bytes(-f.tell() % 8))
+        f.write(edges.tobytes())
+    os.replace(temporary, path)
+
+
+def open_edges(path):
+    """
+    Returns (pages, edges) from an edge list file, with `edges` an
+    (E, 2) int32 array memory-mapped from the file rather than read.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not an edge list file")
+        magic, version, size, count, length = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an edge list file of version {VERSION}")
+        offsets = np.frombuffer(f.read(8 * (size + 1)), dtype=np.int64)
+        names = f.read(length)
+
+    pages = [
+        str(names[offsets[i]:offsets[i + 1]], "utf-8") for i in range(size)
+    ]
+    start = HEADER.size + offsets.nbytes + length
+    start += -start % 8
+    if count == 0:
+        return pages, np.zeros((0, 2), dtype=np.int32)
+    edges = np.memmap(path, dtype=np.int32, mode="r", offset=start, shape=(count, 2))
+    return pages, edges
+
+
+def read_edges(path):
+    """
+    Returns the LinkGraph stored in an edge list file.
+    """
+    pages, edges = open_edges(path)
+    indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edges[:, 0], minlength=len(pages)), out=indptr[1:])
+    return LinkGraph(pages, indptr, np.array(edges[:, 1], dtype=np.int64))
+
+
+if __name__ == "__main__":
+    main()
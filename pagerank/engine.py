@@ -0,0 +1,298 @@
+import math
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg
+
+# Residual at which iteration stops, by default the largest change
+# in any page's rank
+TOLERANCE = 0.001
+
+# Iterations after which iteration stops even if not converged
+MAX_ITERATIONS = 1000
+
+# Random surfers walking the corpus side by side when sampling
+SURFERS = 4096
+
+# Fewest counted steps each surfer takes, so that walks are long
+# enough to forget where they started
+MIN_STEPS = 100
+
+# Weight left on a surfer's random start after its uncounted burn-in
+BURN_IN_ERROR = 0.001
+
+class LinkGraph():
+    """
+    Corpus with pages interned to integers.
+
+    `pages[i]` is the name of page i and its out-links are
+    `indices[indptr[i]:indptr[i + 1]]`. `out_degree[i]` is the number
+    of links page i has, which for a corpus built by hand may count
+    links to pages outside the corpus, as `len(corpus[page])` does.
+    """
+    def __init__(self, pages, indptr, indices, out_degree=None):
+        self.pages = pages
+        self.indptr = indptr
+        self.indices = indices
+        self.out_degree = np.diff(indptr) if out_degree is None else out_degree
+        self._matrix = None
+
+    def __len__(self):
+        return len(self.pages)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Returns the LinkGraph of a corpus dictionary as returned by `crawl`.
+        Links to pages outside the corpus are dropped but still counted
+        in the linking page's out-degree.
+        """
+        pages = list(corpus)
+        number = {page: i for i, page in enumerate(pages)}
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(number[link] for link in corpus[page] if link in number)
+            indices.extend(links)
+            indptr[i + 1] = len(indices)
+        out_degree = np.array([len(corpus[page]) for page in pages], dtype=np.int64)
+        return cls(pages, indptr, np.array(indices, dtype=np.int64), out_degree)
+
+    def dangling(self):
+        """
+        Returns a boolean mask of pages without links. A random surfer
+        on such a page picks any page in the corpus, itself included.
+        """
+        return self.out_degree == 0
+
+    def matrix(self):
+        """
+        Returns the sparse transition matrix, built once: entry [j, i] is
+        1 / out_degree[i] for every link from page i to page j. Columns
+        of dangling pages are empty, their rank is spread separately.
+        """
+        if self._matrix is None:
+            size = len(self.pages)
+            sources = np.repeat(np.arange(size), np.diff(self.indptr))
+            weights = 1 / self.out_degree[sources]
+            self._matrix = sparse.csr_matrix(
+                (weights, (self.indices, sources)), shape=(size, size)
+            )
+        return self._matrix
+
+    def ranks(self, vector):
+        """
+        Returns a dictionary of page names to values of a rank vector.
+        """
+        return dict(zip(self.pages, np.asarray(vector).tolist()))
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, ranks=None):
+    """
+    Returns (ranks, iterations) from repeatedly applying
+
+        PR = (1 - d) / N + d * (M PR + dangling PR / N)
+
+    starting from `ranks`, or uniform ranks, until no page's rank
+    changes by more than `tolerance` or `max_iterations` is reached.
+    """
+    ranks, trace = solve(graph, damping_factor, "power", tolerance,
+                         max_iterations, ranks)
+    return ranks, len(trace)
+
+
+def solve(graph, damping_factor, method="power", tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS, ranks=None, norm="max"):
+    """
+    Returns (ranks, trace) for a graph with one of the SOLVERS, starting
+    from `ranks` or uniform ranks. `trace` holds the residual of every
+    iteration: the largest change in a page's rank with `norm` "max",
+    or the sum of all changes with `norm` "l1". Iteration stops once the
+    residual is at most `tolerance` or after `max_iterations`.
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"unknown method {method}, expected one of {', '.join(SOLVERS)}")
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm}, expected one of {', '.join(NORMS)}")
+    if ranks is None:
+        ranks = np.full(len(graph), 1 / len(graph))
+    return SOLVERS[method](graph, damping_factor, tolerance, max_iterations,
+                           ranks, NORMS[norm])
+
+
+def jacobi(graph, damping_factor, tolerance, max_iterations, ranks, residual):
+    """
+    Power iteration: every page's new rank is computed from the
+    previous ranks of all pages, one sparse product per iteration.
+    """
+    size = len(graph)
+    matrix = graph.matrix()
+    dangling = graph.dangling()
+    teleport = (1 - damping_factor) / size
+
+    trace = []
+    for _ in range(max_iterations):
+        spread = ranks[dangling].sum() / size
+        new_ranks = teleport + damping_factor * (matrix @ ranks + spread)
+        trace.append(residual(new_ranks - ranks))
+        ranks = new_ranks
+        if trace[-1] <= tolerance:
+            break
+    return ranks, trace
+
+
+def gauss_seidel(graph, damping_factor, tolerance, max_iterations, ranks, residual):
+    """
+    Gauss-Seidel iteration: pages are updated in order and each page
+    already uses the new values of the pages before it.
+
+    Splitting M into its lower part L, diagonal included, and its upper
+    part U, a sweep is one sparse triangular solve of
+
+        (I - d L) PR' = (1 - d) / N + d * (U PR + dangling PR / N)
+
+    with the dangling term taken from the previous ranks. I - d L is
+    factored once, in page order, so a sweep costs about two sparse
+    products. A sweep does not keep the total rank, and error along
+    the ranks themselves would then decay no faster than d per sweep,
+    so the ranks of every sweep are rescaled to the total that the
+    PageRank equation gives them.
+    """
+    size = len(graph)
+    matrix = graph.matrix()
+    dangling = graph.dangling()
+    identity = sparse.identity(size, format="csc")
+    lower = linalg.splu(
+        (identity - damping_factor * sparse.tril(matrix, 0)).tocsc(),
+        permc_spec="NATURAL", diag_pivot_thresh=0, options={"SymmetricMode": True},
+    )
+    upper = sparse.triu(matrix, 1, format="csr")
+    teleport = (1 - damping_factor) / size
+
+    # Share of each page's rank that stays in the corpus after one step
+    kept = np.asarray(matrix.sum(axis=0)).ravel() + dangling
+
+    trace = []
+    for _ in range(max_iterations):
+        spread = ranks[dangling].sum() / size
+        new_ranks = lower.solve(teleport + damping_factor * (upper @ ranks + spread))
+        new_ranks *= (1 - damping_factor) / (
+            new_ranks.sum() - damping_factor * (kept @ new_ranks))
+        trace.append(residual(new_ranks - ranks))
+        ranks = new_ranks
+        if trace[-1] <= tolerance:
+            break
+    return ranks, trace
+
+
+def max_change(change):
+    """
+    Returns the largest absolute change of any page's rank, in any
+    column for several rank vectors.
+    """
+    return float(np.abs(change).max()) if len(change) else 0.0
+
+
+def l1_change(change):
+    """
+    Returns the sum of absolute changes of all pages' ranks, or the
+    largest such sum over the columns of several rank vectors.
+    """
+    return float(np.abs(change).sum(axis=0).max()) if len(change) else 0.0
+
+
+def personalized_iteration(graph, damping_factor, teleport, tolerance=TOLERANCE,
+                           max_iterations=MAX_ITERATIONS, norm="max"):
+    """
+    Returns (ranks, trace) for many personalized PageRanks at once.
+    Column b of the N x B `teleport` matrix is the distribution the
+    surfer of vector b jumps to with probability 1 - d, so each
+    iteration is a single sparse matrix-matrix product:
+
+        PR = (1 - d) V + d * (M PR + dangling PR / N)
+
+    Dangling pages still spread their rank over all pages. Iteration
+    stops once every column's residual is at most `tolerance`.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm}, expected one of {', '.join(NORMS)}")
+    residual = NORMS[norm]
+    size = len(graph)
+    matrix = graph.matrix()
+    dangling = graph.dangling()
+    teleport = (1 - damping_factor) * np.asarray(teleport, dtype=float)
+
+    # Update in place, the N x B temporaries dominate the product itself
+    ranks = teleport / (1 - damping_factor)
+    trace = []
+    for _ in range(max_iterations):
+        spread = ranks[dangling].sum(axis=0) / size
+        new_ranks = matrix @ ranks
+        new_ranks += spread
+        new_ranks *= damping_factor
+        new_ranks += teleport
+        change = np.abs(np.subtract(new_ranks, ranks, out=ranks), out=ranks)
+        trace.append(residual(change))
+        ranks = new_ranks
+        if trace[-1] <= tolerance:
+            break
+    return ranks, trace
+
+
+def sample_walk(graph, damping_factor, n, surfers=SURFERS, rng=None):
+    """
+    Returns visit frequencies of `n` random surfer steps.
+
+    Up to `surfers` independent surfers start on random pages and move
+    together, one NumPy step per round: with probability
+    `damping_factor` each follows a random link of its page (found in
+    O(1) from the CSR offsets), otherwise, or if its page has no links,
+    it jumps to any page at random.
+
+    A walk forgets its start at the rate `damping_factor`, so each
+    surfer first takes enough uncounted steps to leave BURN_IN_ERROR of
+    its random start, and there are never so many surfers that each
+    counts fewer than MIN_STEPS steps.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    size = len(graph)
+    links = np.diff(graph.indptr)
+    surfers = max(1, min(surfers, n // MIN_STEPS))
+    positions = rng.integers(size, size=surfers)
+    visits = np.zeros(size, dtype=np.int64)
+
+    def step(positions):
+        count = len(positions)
+        follow = (rng.random(count) < damping_factor) & (links[positions] > 0)
+        jumps = rng.integers(size, size=count)
+        choice = (rng.random(count) * links[positions]).astype(np.int64)
+        targets = graph.indices[graph.indptr[positions][follow] + choice[follow]]
+        jumps[follow] = targets
+        return jumps
+
+    if 0 < damping_factor < 1:
+        for _ in range(math.ceil(math.log(BURN_IN_ERROR) / math.log(damping_factor))):
+            positions = step(positions)
+
+    remaining = n
+    while remaining > 0:
+        if remaining < surfers:
+            positions = positions[:remaining]
+        positions = step(positions)
+        visits += np.bincount(positions, minlength=size)
+        remaining -= len(positions)
+    return visits / n
+
+
+# Residual norms, by name
+NORMS = {
+    "max": max_change,
+    "l1": l1_change,
+}
+
+# Solvers for `solve`, by name
+SOLVERS = {
+    "power": jacobi,
+    "gauss-seidel": gauss_seidel,
+}
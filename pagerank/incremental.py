@@ -0,0 +1,228 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from crawler import page_links
+from engine import LinkGraph, MAX_ITERATIONS, TOLERANCE, power_iteration
+
+DAMPING = 0.85
+
+# Seconds between polls of the corpus directory
+INTERVAL = 1.0
+
+# Name of the state file kept inside the corpus directory
+STATE_FILE = "pagerank.npz"
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python incremental.py corpus [interval]")
+    interval = float(sys.argv[2]) if len(sys.argv) == 3 else INTERVAL
+
+    ranker = IncrementalRank(sys.argv[1])
+    try:
+        while True:
+            start = time.perf_counter()
+            changed = ranker.refresh()
+            if changed:
+                elapsed = time.perf_counter() - start
+                ranks = ranker.ranks()
+                top = sorted(ranks, key=ranks.get, reverse=True)[:3]
+                print(f"{changed} pages changed, {len(ranks)} pages, "
+                      f"{ranker.iterations} iterations in {elapsed:.2f}s: "
+                      + ", ".join(f"{page} {ranks[page]:.4f}" for page in top))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+class IncrementalRank():
+    """
+    PageRank of a corpus directory that is kept up to date as its HTML
+    files change.
+
+    Each refresh stats every file, re-parses only those whose mtime or
+    size changed, patches their links and warm-starts power iteration
+    from the previous ranks, so a small edit converges in a few
+    iterations. Links, stamps and ranks are saved to a state file in
+    the directory, so a restarted process also starts warm.
+
+    Every name seen, as a page or as a link, is interned to an integer
+    in `names`, and `links[page]` holds the ids of all links of a page,
+    including links to names that are not pages (yet). Building the
+    LinkGraph then only takes array operations.
+    """
+    def __init__(self, directory, damping_factor=DAMPING, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS):
+        self.directory = directory
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.path = os.path.join(directory, STATE_FILE)
+
+        self.names = []
+        self.number = {}
+        self.links = {}
+        self.stamps = {}
+        self.pages = []
+        self.vector = np.zeros(0)
+        self.iterations = 0
+        self.load()
+
+    def intern(self, name):
+        """
+        Returns the integer of a page or link name, adding it if new.
+        """
+        if name not in self.number:
+            self.number[name] = len(self.names)
+            self.names.append(name)
+        return self.number[name]
+
+    def refresh(self):
+        """
+        Brings the ranks up to date with the directory. Returns the
+        number of pages added, changed or removed.
+        """
+        stamps = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".html"):
+                stat = entry.stat()
+                stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        changed = [page for page in stamps if self.stamps.get(page) != stamps[page]]
+        removed = [page for page in self.stamps if page not in stamps]
+        if not changed and not removed:
+            return 0
+
+        for page in removed:
+            del self.links[page]
+        for page in changed:
+            self.intern(page)
+            _, links = page_links(self.directory, page)
+            self.links[page] = np.array(
+                sorted(self.intern(link) for link in links), dtype=np.int64
+            )
+        self.stamps = stamps
+
+        self.update()
+        self.save()
+        return len(changed) + len(removed)
+
+    def graph(self):
+        """
+        Returns the LinkGraph of the current pages, keeping only links
+        to pages in the corpus as `crawl` does.
+        """
+        pages = list(self.links)
+        ids = np.array([self.number[page] for page in pages], dtype=np.int64)
+        position = np.full(len(self.names), -1, dtype=np.int64)
+        position[ids] = np.arange(len(pages))
+
+        counts = [len(self.links[page]) for page in pages]
+        links = np.concatenate([self.links[page] for page in pages] or [ids])
+        sources = np.repeat(np.arange(len(pages)), counts)
+        keep = position[links] >= 0
+
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[keep], minlength=len(pages)), out=indptr[1:])
+        return LinkGraph(pages, indptr, position[links[keep]])
+
+    def update(self):
+        """
+        Recomputes the ranks starting from the previous ones. Pages new
+        to the corpus start with the average rank, then the vector is
+        normalized to sum to 1.
+        """
+        graph = self.graph()
+        if not len(graph):
+            self.pages, self.vector, self.iterations = [], np.zeros(0), 0
+            return
+
+        previous = np.full(len(self.names), np.nan)
+        previous[[self.number[page] for page in self.pages]] = self.vector
+        start = previous[[self.number[page] for page in graph.pages]]
+        if np.isnan(start).all():
+            start[:] = 1 / len(graph)
+        else:
+            start[np.isnan(start)] = np.nanmean(start)
+            start /= start.sum()
+
+        self.vector, self.iterations = power_iteration(
+            graph, self.damping_factor, self.tolerance, self.max_iterations, start
+        )
+        self.pages = graph.pages
+
+    def ranks(self):
+        """
+        Returns a dictionary of page names to their current PageRank.
+        """
+        return {page: float(rank) for page, rank in zip(self.pages, self.vector)}
+
+    def load(self):
+        """
+        Restores names, links, stamps and ranks from the state file, if any.
+        """
+        try:
+            state = np.load(self.path)
+        except FileNotFoundError:
+            return
+        with state:
+            self.names = split(state["names"])
+            pages = state["pages"].tolist()
+            offsets = state["offsets"].tolist()
+            links = state["links"]
+            stamps = state["stamps"].tolist()
+            self.vector = state["ranks"]
+
+        self.number = {name: i for i, name in enumerate(self.names)}
+        self.pages = [self.names[page] for page in pages]
+        for i, page in enumerate(self.pages):
+            self.links[page] = links[offsets[i]:offsets[i + 1]]
+            self.stamps[page] = tuple(stamps[i])
+
+    def save(self):
+        """
+        Writes names, links, stamps and ranks to the state file,
+        replacing it. Names are joined with NUL, which cannot appear in
+        file names.
+        """
+        offsets = np.zeros(len(self.pages) + 1, dtype=np.int64)
+        np.cumsum([len(self.links[page]) for page in self.pages], out=offsets[1:])
+        links = [self.links[page] for page in self.pages]
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                names=join(self.names),
+                pages=np.array([self.number[page] for page in self.pages], dtype=np.int64),
+                offsets=offsets,
+                links=np.concatenate(links or [np.zeros(0, dtype=np.int64)]),
+                stamps=np.array(
+                    [self.stamps[page] for page in self.pages], dtype=np.int64
+                ).reshape(-1, 2),
+                ranks=self.vector,
+            )
+        os.replace(temporary, self.path)
+
+
+def join(names):
+    """
+    Returns a list of names as a NUL-separated UTF-8 byte array.
+    """
+    return np.frombuffer("\0".join(names).encode("utf-8"), dtype=np.uint8)
+
+
+def split(data):
+    """
+    Returns the list of names in a byte array made by `join`. The first
+    name is always a page, so an empty array means no names.
+    """
+    text = data.tobytes().decode("utf-8")
+    return text.split("\0") if text else []
+
+
+if __name__ == "__main__":
+    main()
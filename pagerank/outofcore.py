@@ -0,0 +1,102 @@
+import sys
+import time
+
+import numpy as np
+
+from crawler import open_edges
+from engine import MAX_ITERATIONS, NORMS, TOLERANCE
+
+DAMPING = 0.85
+
+# Edges read from the file at a time
+BLOCK = 1 << 22
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python outofcore.py edges [block]")
+    block = int(sys.argv[2]) if len(sys.argv) == 3 else BLOCK
+
+    stream = EdgeStream(sys.argv[1], block)
+    start = time.perf_counter()
+    ranks, trace = stream.iterate(DAMPING)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(stream.pages)} pages, {len(stream.edges)} links, "
+          f"{len(trace)} iterations in {elapsed:.2f}s "
+          f"({stream.edges_per_second / 1e6:.1f}M edges/second)")
+    for i in np.argsort(ranks)[::-1][:10]:
+        print(f"  {stream.pages[i]}: {ranks[i]:.4f}")
+
+
+class EdgeStream():
+    """
+    PageRank over an edge list file written by crawler.py, for link
+    graphs too large to hold in memory.
+
+    The (source, target) pairs stay memory-mapped and are read `block`
+    edges at a time in file order, so besides the page names only a
+    few vectors of N values are held in memory: the ranks, their next
+    iterate and the out-degrees.
+    """
+    def __init__(self, path, block=BLOCK):
+        self.pages, self.edges = open_edges(path)
+        self.block = block
+        self.edges_per_second = 0
+
+        # Sources are sorted, so each block covers a range of pages
+        self.out_degree = np.zeros(len(self.pages), dtype=np.int64)
+        for edges in self.blocks():
+            low = edges[0, 0]
+            counts = np.bincount(edges[:, 0] - low)
+            self.out_degree[low:low + len(counts)] += counts
+
+    def blocks(self):
+        """
+        Yields the edges in consecutive blocks, read from the file.
+        """
+        for start in range(0, len(self.edges), self.block):
+            yield np.asarray(self.edges[start:start + self.block])
+
+    def iterate(self, damping_factor, tolerance=TOLERANCE,
+                max_iterations=MAX_ITERATIONS, norm="max"):
+        """
+        Returns (ranks, trace) by power iteration, as `engine.solve`
+        does, with one pass over the edge file per iteration. Sets
+        `edges_per_second` to the streaming rate of the last run.
+        """
+        if norm not in NORMS:
+            raise ValueError(f"unknown norm {norm}, expected one of {', '.join(NORMS)}")
+        residual = NORMS[norm]
+        size = len(self.pages)
+        dangling = self.out_degree == 0
+        teleport = (1 - damping_factor) / size
+
+        ranks = np.full(size, 1 / size)
+        share = np.zeros(size)
+        trace = []
+        streamed = 0
+        start = time.perf_counter()
+        for _ in range(max_iterations):
+            # Rank each page passes along every one of its links
+            np.divide(ranks, self.out_degree, out=share, where=~dangling)
+
+            new_ranks = np.zeros(size)
+            for edges in self.blocks():
+                np.add.at(new_ranks, edges[:, 1], share[edges[:, 0]])
+            streamed += len(self.edges)
+
+            new_ranks *= damping_factor
+            new_ranks += teleport + damping_factor * ranks[dangling].sum() / size
+            trace.append(residual(new_ranks - ranks))
+            ranks = new_ranks
+            if trace[-1] <= tolerance:
+                break
+
+        elapsed = time.perf_counter() - start
+        self.edges_per_second = streamed / elapsed if elapsed else 0
+        return ranks, trace
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
 import os
-import random
 import re
 import sys
 
+import numpy as np
+
+from crawler import read_edges
+from engine import (
+    LinkGraph, MAX_ITERATIONS, SURFERS, TOLERANCE, personalized_iteration,
+    sample_walk, solve
+)
+from outofcore import EdgeStream
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Personalization vectors computed together by personalized_pagerank
+BATCH = 256
+
 
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+
+    # A corpus may also be an edge list file written by crawler.py
+    if os.path.isfile(sys.argv[1]):
+        corpus = sys.argv[1]
+    else:
+        corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -89,139 +105,105 @@ def transition_model(corpus, page, damping_factor):
     return prob_dist
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, surfers=SURFERS):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The `n` samples are shared between `surfers` random surfers that
+    walk side by side as NumPy arrays, each sampled with the same
+    distribution as `transition_model`.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # initalize sample rank to blank dictionary
-    # This will hold the Page Rank for each page in corpus
-    sample_rank = {}
-
-    # get all pages list from corpus
-    page_list = list(corpus)
-
-    # select a random page
-    selected_page = page_list[random.randint(0, len(page_list)-1)]
-
-    # loop over based on provided sampling number
-    for sample_idx in range(0,n):
-
-        # get the probability distribution of selected page
-        prob_dist = transition_model(corpus, selected_page, damping_factor)
-
-        # pick a random number between 0 and 1
-        rand_num = random.random()
-
-        # initialize range limit to 0
-        range_limit = 0
-
-        # iterate over each page in corpus
-        # Pick next page based on distribution
-        # The way I implemented this as per example below
-        #   rand_num - Pick a random number between 0 and 1. Say rand_num is 0.9
-        #   I set the range limits based on probability distribution of selected page
-        #   e.g for probability distibution <0.5, 0.2, 0.3>, I set ranges as below
-        #       rand_num <= 0.5
-        #       rand_num <= 0.7 (which is 0.5 + 0.2)
-        #       rand_num <= 1.0 (which is 0.5 + 0.2 + 0.3)
-        #   and pick the page that satisfies a specific range condition
-        for pg in page_list:
-            # set the range limit based on probability distribution of page
-            range_limit = range_limit + prob_dist[pg]
-
-            # if the rand_num is less or equal to computed range limit, then select it as next page
-            if rand_num <= range_limit:
-                selected_page = pg
-                # increment the visit count of picked page in the sample_rank
-                if(selected_page in sample_rank):
-                    sample_rank[selected_page] = sample_rank[selected_page] + 1
-                else:
-                    sample_rank[selected_page] = 1
-                break
-        
-
-    # normalizing
-    for page, visit_count in sample_rank.items():
-        sample_rank[page] = sample_rank[page] / n
-
-    return sample_rank 
-
-
-def iterate_pagerank(corpus, damping_factor):
+    graph = link_graph(corpus)
+    return graph.ranks(sample_walk(graph, damping_factor, n, surfers))
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     max_iterations=MAX_ITERATIONS, method="power", norm="max"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    The corpus is turned into a sparse transition matrix once, and each
+    iteration is a single sparse matrix-vector product, or with `method`
+    "gauss-seidel" one sweep that updates pages in place. Iteration
+    stops when no page's rank changes by more than `tolerance`, or with
+    `norm` "l1" when the ranks change by at most `tolerance` in total,
+    or after `max_iterations`.
+
+    If `corpus` is the path of an edge list file written by crawler.py,
+    power iteration streams the links from the file instead of loading
+    them, so the link graph may be larger than memory.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # set accuracy value
-    accuracy = 0.001
+    if isinstance(corpus, str):
+        if method != "power":
+            raise ValueError("edge list files can only be ranked with method power")
+        stream = EdgeStream(corpus)
+        ranks, _ = stream.iterate(damping_factor, tolerance, max_iterations, norm)
+        return dict(zip(stream.pages, ranks.tolist()))
 
-    # initalize iterate rank to blank dictionary
-    # This will hold the Page Rank for each page in corpus
-    iterate_rank = {}
+    graph = link_graph(corpus)
+    ranks, _ = solve(graph, damping_factor, method, tolerance, max_iterations,
+                     norm=norm)
+    return graph.ranks(ranks)
 
-    # get all pages list from corpus
-    page_list = list(corpus)
-    page_count = len(page_list)
 
-    # assign equal probabilty to all pages in corpus
-    prob = 1 / page_count
-    for page in page_list:
-        iterate_rank[page] = prob
-    
-    # compute random link probability
-    random_prob = (1 - damping_factor) / page_count
-
-    continueIteration = True
-
-    while continueIteration:
-        new_iterate_rank = {}
-
-        # for each page
-        for page in page_list:
-            # get all the parent pages which contains link to this page
-            parent_pages = get_parent_pages(corpus, page)
-            
-            linked_prob = 0
-            # iterate thru each parent page and summate the links probability
-            for parent in parent_pages:
-
-                # number of links in the parent page
-                no_of_links = len(corpus[parent])
-
-                # if there are no links then consider it has links to all pages including itself
-                if no_of_links == 0:
-                    no_of_links = page_count
-
-                # compute and summate the calculated probability
-                linked_prob = linked_prob + (iterate_rank[parent] / no_of_links)
-
-            # compute new Page Rank
-            new_iterate_rank[page] = random_prob + (damping_factor * linked_prob)
-        
-        shouldContinue = False
-        # check if the deviation between previous and new page ranks is within the state accuracy
-        # if deviation is within the defined accuracy, then Page Rank has converged and stop further calculation
-        for page in page_list:
-            if abs(iterate_rank[page] - new_iterate_rank[page]) > accuracy:
-                shouldContinue = True
-                break
-        
-        continueIteration = shouldContinue
-
-        # assign iterate_rank to new rank
-        iterate_rank = new_iterate_rank.copy()
-
-    # return page rank
-    return iterate_rank
+def personalized_pagerank(corpus, damping_factor, seeds, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS, batch=BATCH):
+    """
+    Return PageRank values personalized to each entry of `seeds`: with
+    probability `1 - damping_factor` the surfer jumps to a page of that
+    seed set, or with a dictionary of page weights, to a page chosen in
+    proportion to its weight. A surfer on a page without links still
+    picks any page in the corpus.
+
+    Up to `batch` seed sets are solved together, with one sparse
+    matrix-matrix product per iteration. Return a list with one
+    dictionary of page names to PageRank values per seed set.
+    """
+    graph = link_graph(corpus)
+    number = {page: i for i, page in enumerate(graph.pages)}
+
+    results = []
+    for start in range(0, len(seeds), batch):
+        chunk = seeds[start:start + batch]
+        teleport = np.zeros((len(graph), len(chunk)))
+        for column, seed in enumerate(chunk):
+            weights = seed if isinstance(seed, dict) else dict.fromkeys(seed, 1)
+            for page, weight in weights.items():
+                if page not in number:
+                    raise ValueError(f"seed page {page} is not in the corpus")
+                teleport[number[page], column] = weight
+            total = teleport[:, column].sum()
+            if total <= 0:
+                raise ValueError(f"seed set {start + column} has no weight")
+            teleport[:, column] /= total
+
+        ranks, _ = personalized_iteration(graph, damping_factor, teleport,
+                                          tolerance, max_iterations)
+        results.extend(graph.ranks(ranks[:, column]) for column in range(len(chunk)))
+    return results
+
+
+def link_graph(corpus):
+    """
+    Returns the LinkGraph of a corpus, which may already be one or be
+    the path of an edge list file.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    if isinstance(corpus, str):
+        return read_edges(corpus)
+    return LinkGraph.from_corpus(corpus)
+
 
 def get_parent_pages(corpus, page):
     """
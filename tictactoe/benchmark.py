@@ -0,0 +1,141 @@
+import sys
+import time
+
+import bitboard
+import deepening
+import parallel
+import tictactoe
+
+# Worker processes of the parallel search
+PROCESSES = [1, 2, 4]
+
+# (size, k) of the boards searched by iterative deepening
+BOARDS = [(4, None), (4, 3), (5, 4), (6, 4)]
+
+# Engines compared, by name
+ENGINES = {
+    "list": tictactoe,
+    "bitboard": bitboard,
+}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}]")
+    BENCHMARKS[sys.argv[1]]()
+
+
+def reachable_positions():
+    """
+    Returns every position reachable from the initial 3x3 board, the
+    initial board first.
+    """
+    positions = []
+    seen = set()
+    pending = [tictactoe.initial_state()]
+    while pending:
+        board = pending.pop()
+        key = str(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        positions.append(board)
+        if not tictactoe.terminal(board):
+            pending.extend(tictactoe.result(board, action) for action in tictactoe.actions(board))
+    return positions
+
+
+def timed(function, boards):
+    """
+    Returns the seconds taken to call `function` on every board.
+    """
+    start = time.perf_counter()
+    for board in boards:
+        function(board)
+    return time.perf_counter() - start
+
+
+def benchmark_primitives():
+    """
+    Times the board functions of each engine on every reachable position.
+    """
+    positions = reachable_positions()
+    playable = [board for board in positions if not tictactoe.terminal(board)]
+    calls = {
+        "player": (lambda engine: engine.player, positions),
+        "actions": (lambda engine: engine.actions, positions),
+        "result": (lambda engine: lambda board: engine.result(
+            board, min(engine.actions(board))), playable),
+        "winner": (lambda engine: engine.winner, positions),
+        "terminal": (lambda engine: engine.terminal, positions),
+    }
+    print(f"{'function':>9} {'engine':>9} {'us/call':>9}")
+    for name, (function, boards) in calls.items():
+        for engine_name, engine in ENGINES.items():
+            seconds = timed(function(engine), boards)
+            print(f"{name:>9} {engine_name:>9} {seconds / len(boards) * 1e6:>9.2f}")
+
+
+def benchmark_minimax():
+    """
+    Times minimax from the initial board with nothing cached, then on
+    every playable position.
+    """
+    playable = [board for board in reachable_positions() if not tictactoe.terminal(board)]
+    print(f"{'engine':>9} {'first move s':>13} {'all positions s':>16}")
+    for engine_name, engine in ENGINES.items():
+        if engine is tictactoe:
+            tictactoe.table.clear()
+        first = timed(engine.minimax, [engine.initial_state()])
+        total = timed(engine.minimax, playable)
+        print(f"{engine_name:>9} {first:>13.4f} {total:>16.4f}")
+
+
+def benchmark_deepening():
+    """
+    Reports how deep iterative deepening gets on the first move of
+    larger boards within the default budget.
+    """
+    print(f"{'size':>5} {'k':>5} {'depth':>6} {'nodes':>9} {'nodes/s':>9} {'move':>8}")
+    for size, k in BOARDS:
+        search = deepening.Search(
+            bitboard.Bitboard.from_board(tictactoe.initial_state(size), k))
+        start = time.perf_counter()
+        cell = search.run()
+        seconds = time.perf_counter() - start
+        print(f"{size:>5} {str(k or size):>5} {search.depth:>6} {search.nodes:>9} "
+              f"{search.nodes / seconds:>9.0f} {str(divmod(cell, size)):>8}")
+
+
+def benchmark_parallel():
+    """
+    Compares the nodes searched and nodes per second of the serial and
+    the parallel search on the first move of larger boards.
+    """
+    print(f"{'size':>5} {'k':>5} {'processes':>10} {'depth':>6} {'nodes':>9} {'nodes/s':>9}")
+    for size, k in BOARDS:
+        board = tictactoe.initial_state(size)
+        searches = [("serial", deepening.Search(bitboard.Bitboard.from_board(board, k)))]
+        searches += [
+            (processes, parallel.ParallelSearch(bitboard.Bitboard.from_board(board, k),
+                                                processes=processes))
+            for processes in PROCESSES
+        ]
+        for name, search in searches:
+            start = time.perf_counter()
+            search.run()
+            seconds = time.perf_counter() - start
+            print(f"{size:>5} {str(k or size):>5} {name:>10} {search.depth:>6} "
+                  f"{search.nodes:>9} {search.nodes / seconds:>9.0f}")
+
+
+BENCHMARKS = {
+    "primitives": benchmark_primitives,
+    "minimax": benchmark_minimax,
+    "deepening": benchmark_deepening,
+    "parallel": benchmark_parallel,
+}
+
+
+if __name__ == "__main__":
+    main()
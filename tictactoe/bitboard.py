@@ -0,0 +1,274 @@
+"""
+Tic Tac Toe Player on bitboards
+"""
+
+# initial_state is shared, so this module has the same API as tictactoe
+from tictactoe import EMPTY, O, X, initial_state
+
+# Line masks by board size and win length
+line_cache = {}
+
+
+class Bitboard():
+    """
+    Board with each player's stones kept as an integer bitmask, bit
+    `i * size + j` standing for cell (i, j). Moves are made and unmade
+    in place by setting and clearing bits, and wins are found by
+    testing the masks of the lines through the last move.
+
+    A player wins with `k` stones in a row, column or diagonal, or with
+    a full row, column or main diagonal when `k` is None.
+    """
+    def __init__(self, size, x=0, o=0, k=None):
+        self.size = size
+        self.k = k
+        self.stones = {X: x, O: o}
+        self.full = (1 << size * size) - 1
+        self.lines, self.lines_through = line_masks(size, k)
+
+    @classmethod
+    def from_board(cls, board, k=None):
+        """
+        Returns the Bitboard of a list of lists board.
+        """
+        size = len(board)
+        stones = {X: 0, O: 0, EMPTY: 0}
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                stones[cell] |= 1 << (i * size + j)
+        return cls(size, stones[X], stones[O], k)
+
+    def to_board(self):
+        """
+        Returns the board as a list of lists.
+        """
+        board = [[EMPTY] * self.size for _ in range(self.size)]
+        for i in range(self.size):
+            for j in range(self.size):
+                bit = 1 << (i * self.size + j)
+                if self.stones[X] & bit:
+                    board[i][j] = X
+                elif self.stones[O] & bit:
+                    board[i][j] = O
+        return board
+
+    def occupied(self):
+        """
+        Returns the mask of cells holding a stone.
+        """
+        return self.stones[X] | self.stones[O]
+
+    def turn(self):
+        """
+        Returns the player to move: X unless X has more stones.
+        """
+        if bin(self.stones[X]).count("1") > bin(self.stones[O]).count("1"):
+            return O
+        return X
+
+    def moves(self):
+        """
+        Returns the indices of the empty cells, in row order.
+        """
+        empty = self.full & ~self.occupied()
+        return [cell for cell in range(self.size * self.size) if empty >> cell & 1]
+
+    def play(self, cell, mark):
+        """
+        Puts a stone of `mark` on `cell`.
+        """
+        self.stones[mark] |= 1 << cell
+
+    def undo(self, cell, mark):
+        """
+        Takes the stone of `mark` off `cell`.
+        """
+        self.stones[mark] &= ~(1 << cell)
+
+    def wins(self, mark, cell=None):
+        """
+        Returns True if `mark` has a winning line, only looking at the
+        lines through `cell` if given.
+        """
+        stones = self.stones[mark]
+        lines = self.lines if cell is None else self.lines_through[cell]
+        for line in lines:
+            if stones & line == line:
+                return True
+        return False
+
+    def winner(self):
+        """
+        Returns the player with a winning line, or None.
+        """
+        if self.wins(X):
+            return X
+        elif self.wins(O):
+            return O
+        return None
+
+    def terminal(self):
+        """
+        Returns True if the board is full or has a winner.
+        """
+        return self.occupied() == self.full or self.winner() is not None
+
+    def negamax(self, mark, other, alpha, beta):
+        """
+        Returns the value for `mark`, to move, with alpha-beta pruning:
+        1 for a win, -1 for a loss and 0 for a draw.
+        """
+        stones = self.stones
+        empty = self.full & ~(stones[X] | stones[O])
+        if not empty:
+            return 0
+
+        best = -1
+        lines_through = self.lines_through
+        while empty:
+            # take the lowest empty cell
+            bit = empty & -empty
+            empty ^= bit
+            cell = bit.bit_length() - 1
+
+            stones[mark] |= bit
+            mine = stones[mark]
+            for line in lines_through[cell]:
+                if mine & line == line:
+                    score = 1
+                    break
+            else:
+                score = -self.negamax(other, mark, -beta, -alpha)
+            stones[mark] ^= bit
+
+            if score > best:
+                best = score
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+
+def line_masks(size, k=None):
+    """
+    Returns (lines, lines_through) for a `size` x `size` board: the
+    masks of every winning line, and for each cell the masks of the
+    lines through it. With `k`, every run of `k` cells along a row,
+    column or diagonal is a line; otherwise the full rows and columns
+    and the two main diagonals are.
+    """
+    if (size, k) not in line_cache:
+        if k is None or k == size:
+            cells = [
+                [(i, j) for j in range(size)] for i in range(size)
+            ] + [
+                [(i, j) for i in range(size)] for j in range(size)
+            ] + [
+                [(i, i) for i in range(size)],
+                [(i, size - 1 - i) for i in range(size)],
+            ]
+        else:
+            cells = [
+                [(i + n * di, j + n * dj) for n in range(k)]
+                for i in range(size)
+                for j in range(size)
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]
+                if 0 <= i + (k - 1) * di < size and 0 <= j + (k - 1) * dj < size
+            ]
+        lines = [sum(1 << (i * size + j) for i, j in line) for line in cells]
+        lines_through = [
+            [line for line in lines if line >> cell & 1] for cell in range(size * size)
+        ]
+        line_cache[size, k] = (lines, lines_through)
+    return line_cache[size, k]
+
+
+def player(board, k=None):
+    """
+    Returns player who has the next turn on a board.
+    """
+    bitboard = Bitboard.from_board(board, k)
+    if bitboard.terminal():
+        return None
+    return bitboard.turn()
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    size = len(board)
+    return {divmod(cell, size) for cell in Bitboard.from_board(board).moves()}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    if action is None:
+        raise NameError("Invalid action")
+    i, j = action
+    if board[i][j] != EMPTY:
+        raise NameError("Invalid action")
+
+    bitboard = Bitboard.from_board(board)
+    bitboard.play(i * len(board) + j, bitboard.turn())
+    return bitboard.to_board()
+
+
+def winner(board, k=None):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return Bitboard.from_board(board, k).winner()
+
+
+def terminal(board, k=None):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return Bitboard.from_board(board, k).terminal()
+
+
+def utility(board, k=None):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    won = winner(board, k)
+    if won == X:
+        return 1
+    elif won == O:
+        return -1
+    return 0
+
+
+def minimax(board, k=None):
+    """
+    Returns the optimal action for the current player on the board,
+    searching with alpha-beta on a single bitboard that every move is
+    made and unmade on. The search is exhaustive, so past 3x3 boards
+    use `deepening.best_move`.
+    """
+    bitboard = Bitboard.from_board(board, k)
+    if bitboard.terminal():
+        return None
+
+    mark = bitboard.turn()
+    other = O if mark == X else X
+    best_action = None
+    best_score = -2
+    for cell in bitboard.moves():
+        bitboard.play(cell, mark)
+        if bitboard.wins(mark, cell):
+            score = 1
+        else:
+            score = -bitboard.negamax(other, mark, -1, -best_score)
+        bitboard.undo(cell, mark)
+
+        if score > best_score:
+            best_score = score
+            best_action = divmod(cell, bitboard.size)
+            if score == 1:
+                break
+    return best_action
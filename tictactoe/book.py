@@ -0,0 +1,125 @@
+"""
+Opening book of perfect play for 3x3 tic-tac-toe
+"""
+
+import os
+import struct
+import sys
+
+import tictactoe
+from tictactoe import EMPTY, O, X
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+VERSION = 1
+
+MAGIC = b"TTTB"
+
+# Header: magic, version, board size
+HEADER = struct.Struct("<4sBB")
+
+# Entry of a position that is not in the book
+MISSING = 0xFF
+
+# Base 3 digit of each cell
+DIGIT = {EMPTY: 0, X: 1, O: 2}
+
+# Book read by lookup, loaded on first use; False if there is no file
+loaded = None
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [book]")
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK_FILE
+
+    entries = generate()
+    write_book(entries, path)
+    positions = sum(entry != MISSING for entry in entries)
+    print(f"{positions} positions, {len(entries)} bytes written to {path}")
+
+
+def index(board):
+    """
+    Returns the position of a board in the book: its cells read as the
+    digits of a base 3 number, row by row, the first cell lowest.
+    """
+    total = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            total = total * 3 + DIGIT[cell]
+    return total
+
+
+def generate(size=3):
+    """
+    Returns the book of a `size` x `size` board as bytes, one per
+    possible board. Each position reachable in play that is not over
+    holds its best move as a cell index in the low 4 bits and its
+    value plus 1 in the high 4 bits; every other byte is MISSING.
+    """
+    entries = bytearray([MISSING]) * 3 ** (size * size)
+    pending = [tictactoe.initial_state(size)]
+    while pending:
+        board = pending.pop()
+        position = index(board)
+        if entries[position] != MISSING or tictactoe.terminal(board):
+            continue
+
+        i, j = tictactoe.search(board)
+        value = tictactoe.solve(tictactoe.flatten(board), size)
+        entries[position] = (value + 1) << 4 | (i * size + j)
+        pending.extend(tictactoe.result(board, action) for action in tictactoe.actions(board))
+    return bytes(entries)
+
+
+def write_book(entries, path=BOOK_FILE, size=3):
+    """
+    Writes the entries of a book to `path`.
+    """
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size))
+        f.write(entries)
+    os.replace(path + ".tmp", path)
+
+
+def read_book(path=BOOK_FILE):
+    """
+    Returns (size, entries) of the book at `path`.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError(f"{path} is not an opening book")
+        magic, version, size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book of version {VERSION}")
+        entries = f.read()
+    if len(entries) != 3 ** (size * size):
+        raise ValueError(f"{path} is truncated")
+    return size, entries
+
+
+def lookup(board):
+    """
+    Returns (action, value) of a board from the book, with value 1 if
+    X wins with best play, -1 if O wins and 0 for a draw. Returns None
+    if there is no book or the board is not in it.
+    """
+    global loaded
+    if loaded is None:
+        loaded = read_book(BOOK_FILE) if os.path.exists(BOOK_FILE) else False
+    if not loaded:
+        return None
+
+    size, entries = loaded
+    if len(board) != size:
+        return None
+    entry = entries[index(board)]
+    if entry == MISSING:
+        return None
+    return divmod(entry & 0xF, size), (entry >> 4) - 1
+
+
+if __name__ == "__main__":
+    main()
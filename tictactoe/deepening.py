@@ -0,0 +1,222 @@
+"""
+Iterative deepening alpha-beta search for N x N boards with k in a row
+"""
+
+import time
+
+from bitboard import Bitboard
+from tictactoe import O, X
+
+# Seconds a move may take
+BUDGET = 1.0
+
+# Score of a win, less the number of plies it takes
+WIN = 1000000
+
+# Above every score
+INFINITY = 2 * WIN
+
+# Scores near WIN are wins found by search rather than estimates
+PROVEN = WIN - 1000
+
+# Nodes searched between checks of the clock
+CHECK_EVERY = 256
+
+# Transposition table bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Timeout(Exception):
+    pass
+
+
+def best_move(board, k=None, budget=BUDGET):
+    """
+    Returns the best action (i, j) found within `budget` seconds, or
+    None if the game is over.
+    """
+    bitboard = Bitboard.from_board(board, k)
+    if bitboard.terminal():
+        return None
+    search = Search(bitboard, budget)
+    return divmod(search.run(), bitboard.size)
+
+
+class Search():
+    """
+    Iterative deepening negamax with alpha-beta pruning on a Bitboard.
+
+    Each iteration searches one ply deeper until the budget runs out,
+    keeping the best move of the last finished iteration. Moves are
+    ordered by the transposition table's best move, then by how often
+    they caused cutoffs (the history heuristic), then by closeness to
+    the center. Positions at the depth limit are scored by counting,
+    for every line that only one player has stones on, 4 to the power
+    of that player's stones in it.
+    """
+    def __init__(self, bitboard, budget=BUDGET):
+        self.board = bitboard
+        self.deadline = time.perf_counter() + budget
+        self.table = {}
+        self.history = [0] * (bitboard.size * bitboard.size)
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+
+        # Set when a search stopped at the depth limit somewhere
+        self.horizon = False
+
+        length = bitboard.k or bitboard.size
+        self.weights = [0] + [4 ** n for n in range(1, length)]
+
+        # Rank of each cell by distance from the center
+        middle = (bitboard.size - 1) / 2
+        center = sorted(
+            range(bitboard.size * bitboard.size),
+            key=lambda cell: abs(cell // bitboard.size - middle)
+                             + abs(cell % bitboard.size - middle)
+        )
+        self.rank = {cell: n for n, cell in enumerate(center)}
+
+    def run(self):
+        """
+        Returns the best cell for the player to move, searching deeper
+        until out of time, or until the result is exact: the game was
+        searched to its end or a forced win was found.
+        """
+        board = self.board
+        mark = board.turn()
+        other = O if mark == X else X
+        key = (board.stones[X], board.stones[O])
+        saved = dict(board.stones)
+        empty = bin(board.full & ~board.occupied()).count("1")
+
+        best = self.ordered(board.moves(), None)[0]
+        for depth in range(1, empty + 1):
+            self.horizon = False
+            try:
+                score = self.negamax(depth, -INFINITY, INFINITY, mark, other, 0)
+            except Timeout:
+                # Put back the stones of the moves being searched
+                board.stones.update(saved)
+                break
+            best = self.table[key][3]
+            self.depth = depth
+            self.score = score
+            if not self.horizon or abs(score) >= PROVEN:
+                break
+        return best
+
+    def ordered(self, cells, first):
+        """
+        Returns the cells in search order, `first` first.
+        """
+        history = self.history
+        rank = self.rank
+        cells = sorted(cells, key=lambda cell: (-history[cell], rank[cell]))
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
+
+    def negamax(self, depth, alpha, beta, mark, other, ply):
+        """
+        Returns the score of the position for `mark`, to move, searched
+        `depth` plies deep.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        board = self.board
+        stones = board.stones
+        if board.occupied() == board.full:
+            return 0
+
+        key = (stones[X], stones[O])
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            stored_depth, score, bound, first, horizon = entry
+            score = from_table(score, ply)
+            if stored_depth >= depth and (
+                bound == EXACT
+                or (bound == LOWER and score >= beta)
+                or (bound == UPPER and score <= alpha)
+            ):
+                self.horizon = self.horizon or horizon
+                return score
+
+        if depth == 0:
+            self.horizon = True
+            return self.evaluate(mark, other)
+
+        outer_horizon = self.horizon
+        self.horizon = False
+        original_alpha = alpha
+        best = -INFINITY
+        best_cell = None
+        for cell in self.ordered(board.moves(), first):
+            board.play(cell, mark)
+            if board.wins(mark, cell):
+                score = WIN - ply
+            else:
+                score = -self.negamax(depth - 1, -beta, -alpha, other, mark, ply + 1)
+            board.undo(cell, mark)
+
+            if score > best:
+                best = score
+                best_cell = cell
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, to_table(best, ply), bound, best_cell, self.horizon)
+        self.horizon = self.horizon or outer_horizon
+        return best
+
+    def evaluate(self, mark, other):
+        """
+        Returns the heuristic score of the position for `mark`.
+        """
+        mine = self.board.stones[mark]
+        theirs = self.board.stones[other]
+        weights = self.weights
+        score = 0
+        for line in self.board.lines:
+            if line & theirs == 0:
+                score += weights[bin(line & mine).count("1")]
+            elif line & mine == 0:
+                score -= weights[bin(line & theirs).count("1")]
+        return score
+
+
+def to_table(score, ply):
+    """
+    Returns a score relative to the current node, so a stored forced
+    win keeps its length wherever the position is reached again.
+    """
+    if score >= PROVEN:
+        return score + ply
+    elif score <= -PROVEN:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    """
+    Returns a stored score relative to the root again.
+    """
+    if score >= PROVEN:
+        return score - ply
+    elif score <= -PROVEN:
+        return score + ply
+    return score
@@ -0,0 +1,188 @@
+"""
+Parallel root-split alpha-beta search for N x N boards with k in a row
+"""
+
+import multiprocessing
+import sys
+import time
+
+from bitboard import Bitboard
+from deepening import BUDGET, INFINITY, PROVEN, WIN, Search, Timeout
+from tictactoe import O, X, initial_state
+
+# Best score found so far at the root, shared by the workers
+bound = None
+
+# Search of each worker process, reused from one root move to the next
+worker = None
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4, 5]:
+        sys.exit("Usage: python parallel.py size [k] [processes] [budget]")
+    size = int(sys.argv[1])
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    budget = float(sys.argv[4]) if len(sys.argv) > 4 else BUDGET
+
+    search = ParallelSearch(Bitboard.from_board(initial_state(size), k), budget, processes)
+    start = time.perf_counter()
+    cell = search.run()
+    elapsed = time.perf_counter() - start
+    print(f"move {divmod(cell, size)} at depth {search.depth}, score {search.score}")
+    print(f"{search.nodes} nodes in {elapsed:.2f}s ({search.nodes / elapsed:.0f} nodes/second)")
+
+
+def best_move(board, k=None, budget=BUDGET, processes=None):
+    """
+    Returns the best action (i, j) found within `budget` seconds by
+    `processes` worker processes, or None if the game is over.
+    """
+    bitboard = Bitboard.from_board(board, k)
+    if bitboard.terminal():
+        return None
+    search = ParallelSearch(bitboard, budget, processes)
+    return divmod(search.run(), bitboard.size)
+
+
+class ParallelSearch():
+    """
+    Iterative deepening alpha-beta that splits the moves at the root
+    across a pool of worker processes.
+
+    At every depth the first root move, the best one of the previous
+    depth, is searched alone with a full window, as in
+    young-brothers-wait: its score is usually close to the final one,
+    and gives the bound every other root move is then searched
+    against. Its younger brothers are handed to the workers, which
+    read the best score found so far from a shared value before each
+    search, and raise it whenever they find a better move, so root
+    moves searched later are cut off as sharply as in a serial search.
+
+    `nodes` counts the nodes searched by this process and the workers.
+    """
+    def __init__(self, bitboard, budget=BUDGET, processes=None):
+        self.board = bitboard
+        self.budget = budget
+        self.processes = processes or multiprocessing.cpu_count()
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+
+        # Searches the first root move of each depth
+        self.search = Search(bitboard, budget)
+
+    def run(self):
+        """
+        Returns the best cell for the player to move, searching deeper
+        until out of time, or until the result is exact.
+        """
+        board = self.board
+        search = self.search
+        mark = board.turn()
+        other = O if mark == X else X
+        empty = bin(board.full & ~board.occupied()).count("1")
+        shared = multiprocessing.Value("q", -INFINITY)
+        search.deadline = time.perf_counter() + self.budget
+
+        best = search.ordered(board.moves(), None)[0]
+        with multiprocessing.Pool(
+            self.processes, initializer=start_worker,
+            initargs=(shared, board.size, board.k, search.deadline)
+        ) as pool:
+            for depth in range(1, empty + 1):
+                moves = search.ordered(board.moves(), best)
+                try:
+                    eldest, horizon = self.eldest(moves[0], depth, mark, other)
+                except Timeout:
+                    break
+
+                with shared.get_lock():
+                    shared.value = eldest
+                tasks = [
+                    (board.stones[X], board.stones[O], cell, depth, mark)
+                    for cell in moves[1:]
+                ]
+                # Scores of the moves that beat the bound they were searched
+                # against; the others are only known to be no better
+                scores = {moves[0]: eldest}
+                finished = True
+                for cell, score, exact, nodes, deeper in pool.imap_unordered(search_move, tasks):
+                    self.nodes += nodes
+                    if score is None:
+                        finished = False
+                    elif exact:
+                        scores[cell] = score
+                    horizon = horizon or deeper
+                if not finished:
+                    break
+
+                best = max(scores, key=lambda cell: (scores[cell], -moves.index(cell)))
+                self.depth = depth
+                self.score = scores[best]
+                if not horizon or abs(self.score) >= PROVEN:
+                    break
+        return best
+
+    def eldest(self, cell, depth, mark, other):
+        """
+        Returns (score, horizon) of playing `cell`, searched with a full
+        window in this process.
+        """
+        board = self.board
+        search = self.search
+        search.horizon = False
+        nodes = search.nodes
+        saved = dict(board.stones)
+        board.play(cell, mark)
+        try:
+            if board.wins(mark, cell):
+                return WIN, False
+            return -search.negamax(depth - 1, -INFINITY, INFINITY, other, mark, 1), search.horizon
+        finally:
+            board.stones.update(saved)
+            self.nodes += search.nodes - nodes
+
+
+def start_worker(shared, size, k, deadline):
+    """
+    Sets up a worker process with the shared bound and its own search.
+    """
+    global bound, worker
+    bound = shared
+    worker = Search(Bitboard(size, k=k))
+    worker.deadline = deadline
+
+
+def search_move(task):
+    """
+    Returns (cell, score, exact, nodes, horizon) of one root move
+    searched in a worker against the shared bound, with score None if
+    out of time. The score is exact if it beat the bound; otherwise it
+    only tells that the move is no better.
+    """
+    x, o, cell, depth, mark = task
+    other = O if mark == X else X
+    board = worker.board
+    board.stones = {X: x, O: o}
+    worker.horizon = False
+    nodes = worker.nodes
+    alpha = bound.value
+
+    board.play(cell, mark)
+    if board.wins(mark, cell):
+        score = WIN
+    else:
+        try:
+            score = -worker.negamax(depth - 1, -INFINITY, -alpha, other, mark, 1)
+        except Timeout:
+            return cell, None, False, worker.nodes - nodes, False
+
+    with bound.get_lock():
+        if score > bound.value:
+            bound.value = score
+    return cell, score, score > alpha, worker.nodes - nodes, worker.horizon
+
+
+if __name__ == "__main__":
+    main()
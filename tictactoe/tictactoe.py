@@ -2,27 +2,27 @@
 Tic Tac Toe Player
 """
 
-import math
-
 X = "X"
 O = "O"
 EMPTY = None
 
 
-def initial_state():
+def initial_state(size=3):
     """
     Returns starting state of the board.
     """
+    if size != 3:
+        return [[EMPTY] * size for _ in range(size)]
     return [[EMPTY, EMPTY, EMPTY],
             [EMPTY, EMPTY, EMPTY],  
             [EMPTY, EMPTY, EMPTY]]
 
 
-def player(board):
+def player(board, k=None):
     """
     Returns player who has the next turn on a board.
     """
-    if terminal(board) == True:
+    if terminal(board, k) == True:
         return None
     else:
         x_moves = 0
@@ -55,7 +55,7 @@ def actions(board):
                 action_set.add((i, j))
     return action_set
 
-def result(board, action):
+def result(board, action, k=None):
     """
     Returns the board that results from making move (i, j) on the board.
     """
@@ -71,7 +71,7 @@ def result(board, action):
         raise NameError("Invalid action")    
 
     # get current player
-    curr_player = player(board)
+    curr_player = player(board, k)
 
     # assign current player to the cloned board
     result_board = cloneBoard(board)
@@ -89,20 +89,25 @@ def cloneBoard(board):
     
     return clone
 
-def winner(board):
+def winner(board, k=None):
     """
-    Returns the winner of the game, if there is one.
+    Returns the winner of the game, if there is one. With `k`, the
+    winner is the first to get `k` in a row, column or diagonal,
+    otherwise a whole row, column or main diagonal is needed.
     """
-    if check_if_winner(X,board):
+    if check_if_winner(X,board,k):
         return X
-    elif check_if_winner(O,board):
+    elif check_if_winner(O,board,k):
         return O
     else:
         return None
 
-def check_if_winner(player, board):
-    is_winner = False
+def check_if_winner(player, board, k=None):
     size = len(board)
+    if k is not None and k != size:
+        return check_if_k_in_row(player, board, k)
+
+    is_winner = False
 
     # to keep track of diagnol occurrance of player
     diag_1_count = 0
@@ -148,7 +153,26 @@ def check_if_winner(player, board):
 
     return is_winner    
 
-def terminal(board):
+def check_if_k_in_row(player, board, k):
+    size = len(board)
+
+    # from every cell, count the player's stones going right, down
+    # and along both diagonals
+    for i in range(0, size):
+        for j in range(0, size):
+            for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                end_i = i + (k - 1) * di
+                end_j = j + (k - 1) * dj
+                if not (0 <= end_i < size and 0 <= end_j < size):
+                    continue
+                count = 0
+                while count < k and board[i + count * di][j + count * dj] == player:
+                    count += 1
+                if count == k:
+                    return True
+    return False
+
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
@@ -163,18 +187,18 @@ def terminal(board):
             break
 
     # if there are no empty cells or there is a winner, then return true
-    if has_empty_cell == False or winner(board) != None:
+    if has_empty_cell == False or winner(board, k) != None:
         return True
     else:
         return False
         
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
     score = 0
-    player_won = winner(board)
+    player_won = winner(board, k)
 
     if player_won == X:
         score = 1
@@ -183,117 +207,164 @@ def utility(board):
     
     return score
 
-def minimax(board):
+def minimax(board, k=None, budget=None, processes=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Moves of 3x3 positions are read from the opening book written by
+    book.py, and searched when there is no book. Larger boards, or a
+    win length `k` other than the board size, are searched by
+    iterative deepening for at most `budget` seconds, split across
+    `processes` worker processes if given.
     """
-    # max value method with alpha-beta pruning
-    def max_value(board, alpha, beta):
+    if terminal(board, k):
+        return None
 
-        # if terminal state then return utility of the board
-        if terminal(board):
-            return utility(board)
+    size = len(board)
+    if size != 3 or k not in [None, size]:
+        from deepening import BUDGET, best_move
+        budget = BUDGET if budget is None else budget
+        if processes is not None:
+            import parallel
+            return parallel.best_move(board, k, budget, processes)
+        return best_move(board, k, budget)
+
+    from book import lookup
+    entry = lookup(board)
+    if entry is not None:
+        return entry[0]
+    return search(board)
+
+
+def search(board):
+    """
+    Returns the optimal action for the current player on a board that
+    is not over, by minimax.
 
-        # initializing best max to negative Infinity
-        best_max = - math.inf
-        action_set = actions(board)
+    Positions are solved once and their values kept in `table`, keyed
+    by the canonical form of the board under its 8 rotations and
+    reflections, so symmetric positions and positions reached by other
+    move orders are looked up rather than searched again.
+    """
+    size = len(board)
+    cells = flatten(board)
+    current_player = player(board)
+    best_action = None
+    best_score = None
 
-        # iterate to all possible actions
-        for action in action_set:
+    # iterate thru all possible actions in order, and choose best action
+    for action in sorted(actions(board)):
+        cell = action[0] * size + action[1]
+        score = solve(cells[:cell] + current_player + cells[cell + 1:], size)
 
-            # apply action to the given board state
-            action_result = result(board, action)
+        # X maximizes and O minimizes the score
+        if (best_score is None
+                or (current_player == X and score > best_score)
+                or (current_player == O and score < best_score)):
+            best_score = score
+            best_action = action
 
-            # evaluate score of what a min player would do
-            score = min_value(action_result, alpha, beta)
+    return best_action
 
-            # Get the max value against all possible action score
-            if score > best_max:
-                best_max = score
-            
-            # if score is greater than beta then prune
-            if beta != None and score >= beta:
-                return score
-            
-            # update value of alpha if score is greater
-            if alpha == None or score > alpha:
-                alpha = score
-            
-        return best_max
 
-    # min value method with alpha-beta pruning
-    def min_value(board, alpha, beta):
+# Minimax values of the positions solved so far, by canonical key.
+# Kept for the life of the module, so later moves are lookups.
+table = {}
 
-        # if terminal state then return utility of the board
-        if terminal(board):
-            return utility(board)
+# Cell characters of flattened boards
+CELL = {X: X, O: O, EMPTY: "."}
 
-        # initializing best min to positive Infinity
-        best_min = math.inf
-        action_set = actions(board)
+# Symmetry permutations and winning lines, by board size
+symmetry_cache = {}
+line_cache = {}
 
-        # iterate to all possible actions
-        for action in action_set:
 
-            # apply action to the given board state
-            action_result = result(board, action)
+def flatten(board):
+    """
+    Returns the board as a string of its cells, row by row, with "."
+    for empty cells.
+    """
+    return "".join(CELL[cell] for row in board for cell in row)
 
-            # evaluate score of what a max player would do
-            score = max_value(action_result, alpha, beta)
 
-            # Get the min value against all possible action score
-            if score < best_min:
-                best_min = score
-            
-            # if score is greater than beta then prune
-            if alpha != None and score <= alpha:
-                return score
-            
-            # update value of alpha if score is greater
-            if beta == None or score < beta:
-                beta = score
+def solve(cells, size):
+    """
+    Returns the minimax value of a flattened board: 1 if X wins with
+    best play, -1 if O wins, 0 for a draw.
+    """
+    key = canonical(cells, size)
+    if key in table:
+        return table[key]
+
+    won = line_winner(cells, size)
+    if won is not None:
+        score = 1 if won == X else -1
+    elif "." not in cells:
+        score = 0
+    else:
+        current_player = O if cells.count(X) > cells.count(O) else X
+        best = 1 if current_player == X else -1
+        score = None
+        for cell, mark in enumerate(cells):
+            if mark != ".":
+                continue
+            value = solve(cells[:cell] + current_player + cells[cell + 1:], size)
+            if (score is None
+                    or (current_player == X and value > score)
+                    or (current_player == O and value < score)):
+                score = value
+
+            # no move can do better than winning
+            if score == best:
+                break
 
-        return best_min    
-    
-    # get the current player
-    current_player = player(board)
+    table[key] = score
+    return score
 
-    # initalize
-    best_action = None
-    alpha = None
-    beta = None
-
-    # if current player is Max player X
-    if current_player == X:
-        # initialize best score to negative infinity
-        best_score = - math.inf
-
-        # iterate thru all possible actions, and choose best action
-        for action in actions(board):
-            result_board = result(board, action)
-            score = min_value(result_board, alpha, beta)
-            
-            # if the score found is greater than best_score so far, 
-            # then record the action as best action
-            if score >= best_score:
-                best_score = score
-                best_action = action
-
-    # if current player is Min player O
-    elif current_player == O:
-        # initialize best score to postive infinity
-        best_score = math.inf
-
-        # iterate thru all possible actions, and choose best action
-        for action in actions(board):
-            result_board = result(board, action)
-            score = max_value(result_board, alpha, beta)
-
-            # if the score found is less than best_score so far, 
-            # then record the action as best action
-            if score <= best_score:
-                best_score = score
-                best_action = action
-    
-    # return best action
-    return best_action
\ No newline at end of file
+
+def canonical(cells, size):
+    """
+    Returns the smallest of the 8 symmetric forms of a flattened board.
+    """
+    return min("".join(cells[cell] for cell in permutation) for permutation in symmetries(size))
+
+
+def symmetries(size):
+    """
+    Returns the cell permutations of the 8 rotations and reflections
+    of a `size` x `size` board.
+    """
+    if size not in symmetry_cache:
+        cells = [[i * size + j for j in range(size)] for i in range(size)]
+        permutations = []
+        for _ in range(4):
+            cells = [list(row) for row in zip(*cells[::-1])]
+            permutations.append(tuple(cell for row in cells for cell in row))
+            permutations.append(tuple(cell for row in cells for cell in reversed(row)))
+        symmetry_cache[size] = permutations
+    return symmetry_cache[size]
+
+
+def lines(size):
+    """
+    Returns the cell indices of every row, column and diagonal of a
+    `size` x `size` board.
+    """
+    if size not in line_cache:
+        result = [tuple(i * size + j for j in range(size)) for i in range(size)]
+        result += [tuple(i * size + j for i in range(size)) for j in range(size)]
+        result.append(tuple(i * size + i for i in range(size)))
+        result.append(tuple(i * size + size - 1 - i for i in range(size)))
+        line_cache[size] = result
+    return line_cache[size]
+
+
+def line_winner(cells, size):
+    """
+    Returns the player with a full line on a flattened board, or None.
+    """
+    for line in lines(size):
+        first = cells[line[0]]
+        if first != "." and all(cells[cell] == first for cell in line):
+            return first
+    return None